@@ -1,50 +1,410 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-from fotmob_scraper import scrape_matches
+from snapshot import SnapshotRegistry
+from fixture_store import FixtureStore
+from persistence import SnapshotArchive
+from shared_snapshot import SharedSnapshots
+from standings import StandingsEngine
+from live_feed import LiveFeed
+from sampling_profiler import get_profiler
+from match_index import decode_cursor, encode_cursor, project
+from timezones import clock, get_zone
 from datetime import datetime
+import os
 import pytz
+import time
+
+import metrics
+import serialization
+import settings
 
 app = Flask(__name__)
 CORS(app)
 
+def scrape_matches(team, season):
+    """El stack de scraping (requests, bs4, lxml) se importa en el primer refresco, no al arrancar"""
+    from fotmob_scraper import scrape_matches as scrape
+    return scrape(team, season)
+
+
+# Los partidos se sirven desde snapshots (uno por equipo y temporada) refrescados en segundo plano
+fixtures = FixtureStore()
+archive = SnapshotArchive(settings.SNAPSHOT_DB_PATH) if settings.PERSIST_SNAPSHOTS else None
+live_feed = LiveFeed()
+standings = StandingsEngine()
+shared = (
+    SharedSnapshots(settings.SHARED_SNAPSHOT_DIR, lambda snapshot: build_matches_body(snapshot))
+    if settings.SHARED_SNAPSHOTS else None
+)
+registry = SnapshotRegistry(
+    scrape_matches, fixtures, archive=archive, live_feed=live_feed, shared=shared, standings=standings
+)
+
+STARTED_AT = time.monotonic()
+
+# Profiler por muestreo solo si PROFILER_ENABLED está activo
+profiler = get_profiler()
+
+# Respuestas ligadas al snapshot: cacheables por navegador y CDN
+MATCHES_CACHE_CONTROL = (
+    f"public, max-age={settings.CACHE_MAX_AGE}, "
+    f"stale-while-revalidate={settings.CACHE_STALE_WHILE_REVALIDATE}"
+)
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Histograma de duración por ruta (la plantilla, no la URL, para acotar las series)"""
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "desconocida"
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started, route=route, method=request.method, status=response.status_code
+        )
+    return response
+
+
+# Parámetros que activan la consulta filtrada de /api/matches
+QUERY_PARAMS = ("competition", "status", "from", "to", "fields", "limit", "cursor")
+
+
+def store_for(args):
+    """SnapshotStore de los parámetros team/season; KeyError si el equipo no existe y ValueError
+    si la temporada no está en SEASONS"""
+    team = args.get("team", settings.DEFAULT_TEAM)
+    season = args.get("season", settings.DEFAULT_SEASON)
+    return registry.store(team, season)
+
+
+def parse_int(value, name):
+    """Entero de un parámetro; ValueError con un mensaje para el cliente si no lo es"""
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} debe ser un número entero")
+
+
+def parse_tz(args):
+    """Zona horaria del parámetro tz (None = la del servidor); ValueError si no existe"""
+    tz = args.get("tz")
+    if not tz or tz == settings.TIMEZONE:
+        return None
+    return get_zone(tz).key
+
+
+def localize(data, times):
+    """Sustituir date/time (si están en el dict) por las de la zona pedida"""
+    local = times.get(data["id"])
+    if local is not None:
+        if "date" in data:
+            data["date"] = local[0]
+        if "time" in data:
+            data["time"] = local[1]
+    return data
+
+
+def build_metadata(snapshot, tz=None):
+    return {
+        "fuente": "Transfermarkt (scraper simplificado)",
+        "ultima_actualizacion": snapshot.refreshed_at.isoformat(),
+        "version": "3.1.0-transfermarkt",
+        "zona_horaria": tz or settings.TIMEZONE,
+        "datos_obsoletos": snapshot.stale
+    }
+
+
+def build_matches_body(snapshot, tz=None):
+    """Cuerpo JSON de /api/matches: solo se serializan los partidos nuevos o modificados"""
+    if tz is None:
+        fragments = b",".join(match.to_json() for match in snapshot.matches)
+    else:
+        times = snapshot.local_times(tz)
+        fragments = b",".join(serialization.dumps(localize(match.to_dict(), times)) for match in snapshot.matches)
+    return b"".join([
+        b'{"metadata":', serialization.dumps(build_metadata(snapshot, tz)),
+        b',"partidos_completos":[', fragments,
+        b'],"resumen":', serialization.dumps(snapshot.summary),
+        b"}"
+    ])
+
+
+def parse_match_query(args):
+    """Filtros de /api/matches validados y normalizados"""
+    query = {
+        "competition": args.get("competition") or None,
+        "status": args.get("status") or None,
+        "date_from": args.get("from") or None,
+        "date_to": args.get("to") or None,
+        "after": decode_cursor(args["cursor"]) if args.get("cursor") else None,
+        "limit": None
+    }
+
+    if "limit" in args or "cursor" in args:
+        limit = parse_int(args.get("limit", settings.DEFAULT_PAGE_SIZE), "limit")
+        query["limit"] = max(1, min(limit, settings.MAX_PAGE_SIZE))
+
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()]
+    return query, fields
+
+
+def build_query_body(snapshot, query, fields, tz=None):
+    """Cuerpo JSON de una consulta filtrada, resuelta con los índices del snapshot"""
+    matches, next_key = snapshot.index.query(**query)
+    items = project(matches, fields)
+    if tz is not None:
+        times = snapshot.local_times(tz)
+        items = [localize(item, times) for item in items]
+    return serialization.dumps({
+        "metadata": build_metadata(snapshot, tz),
+        "partidos_completos": items,
+        "resumen": snapshot.summary,
+        "paginacion": {
+            "devueltos": len(matches),
+            "siguiente_cursor": encode_cursor(next_key) if next_key else None
+        }
+    })
+
+
+def cached_response(artifact, mimetype, cache_control, last_modified):
+    """Respuesta precomprimida con ETag/Last-Modified; 304 si el cliente ya la tiene"""
+    encoding, body, etag = artifact.variant(request.accept_encodings)
+
+    if isinstance(body, memoryview):
+        # Cuerpo en el snapshot compartido: sendfile desde el fichero o trozos del mapeo, sin copiarlo entero
+        response = Response(artifact.wsgi_body(encoding, request.environ), mimetype=mimetype, direct_passthrough=True)
+        response.content_length = len(body)
+    else:
+        response = Response(body, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = cache_control
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response.make_conditional(request)
+
+
 @app.route("/api/matches", methods=["GET"])
 def get_matches():
     try:
-        team = request.args.get("team", "castilla")
-        season = request.args.get("season", "2025")
+        store = store_for(request.args)
+        tz = parse_tz(request.args)
+
+        if any(param in request.args for param in QUERY_PARAMS):
+            query, fields = parse_match_query(request.args)
+            cache_key = "matches?" + repr((sorted(query.items()), fields, tz))
+            snapshot, artifact = store.artifact(
+                cache_key, lambda s: build_query_body(s, query, fields, tz),
+                group="queries", limit=settings.MAX_CACHED_QUERIES
+            )
+        elif tz is not None:
+            snapshot, artifact = store.artifact(
+                f"matches@{tz}", lambda s: build_matches_body(s, tz),
+                group="matches@tz", limit=settings.MAX_CACHED_TIMEZONES
+            )
+        else:
+            snapshot, artifact = store.artifact("matches", build_matches_body)
 
-        matches = scrape_matches()
+        return cached_response(artifact, "application/json", MATCHES_CACHE_CONTROL, snapshot.refreshed_at)
+
+    except KeyError as e:
+        return jsonify({"error": f"Equipo desconocido: {e.args[0]}"}), 404
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        metadata = {
-            "fuente": "Transfermarkt (scraper simplificado)",
-            "ultima_actualizacion": datetime.now(pytz.timezone("America/Guatemala")).isoformat(),
-            "version": "3.1.0-transfermarkt",
-            "zona_horaria": "America/Guatemala"
+
+@app.route("/api/changes", methods=["GET"])
+def get_changes():
+    try:
+        store = store_for(request.args)
+        since = parse_int(request.args.get("since", "0"), "since")
+        snapshot = store.get()
+        entries, complete = store.changes_since(since)
+    except KeyError as e:
+        return jsonify({"error": f"Equipo desconocido: {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "generacion_actual": snapshot.generation,
+        "completo": complete,
+        "cambios": entries
+    })
+
+
+@app.route("/api/live", methods=["GET"])
+def live_stream():
+    """Server-Sent Events con los deltas de los partidos en juego (sin descargar /api/matches entero)"""
+    try:
+        store = store_for(request.args)
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+        last_event_id = parse_int(last_event_id, "Last-Event-ID") if last_event_id else None
+        snapshot = store.get()
+    except KeyError as e:
+        return jsonify({"error": f"Equipo desconocido: {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    team = request.args.get("team", settings.DEFAULT_TEAM)
+    season = request.args.get("season", settings.DEFAULT_SEASON)
+    stream = live_feed.subscribe(team, season, snapshot, last_event_id)
+    return Response(stream, mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.route("/api/standings", methods=["GET"])
+def get_standings():
+    """Clasificación por competición; solo se vuelve a serializar cuando cambia algún resultado"""
+    try:
+        store = store_for(request.args)
+        store.get()
+        team = request.args.get("team", settings.DEFAULT_TEAM)
+        season = request.args.get("season", settings.DEFAULT_SEASON)
+        updated_at, artifact = registry.standings_artifact(team, season, request.args.get("competition"))
+    except KeyError as e:
+        return jsonify({"error": f"Equipo desconocido: {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return cached_response(artifact, "application/json", MATCHES_CACHE_CONTROL, updated_at)
+
+
+@app.route("/api/match/<match_id>", methods=["GET"])
+def get_match(match_id):
+    try:
+        tz = parse_tz(request.args)
+        # Cargar el snapshot pedido (o el del equipo y temporada por defecto) antes de buscar
+        store_for(request.args).get()
+    except KeyError as e:
+        return jsonify({"error": f"Equipo desconocido: {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    match = registry.find(match_id, team=request.args.get("team"), season=request.args.get("season"))
+    if match is None:
+        return jsonify({"error": f"Partido no encontrado: {match_id}"}), 404
+    data = match.to_dict()
+    if tz is not None and match.kickoff is not None:
+        data["date"], data["time"] = clock(tz).local(match.kickoff)
+    return jsonify(data)
+
+
+@app.route("/api/teams", methods=["GET"])
+def get_teams():
+    registry.ensure_indexed()
+    return jsonify({
+        team: {
+            "nombre": config["name"],
+            "temporadas": fixtures.seasons(team),
+            "competiciones": {season: fixtures.competitions(team, season) for season in fixtures.seasons(team)}
         }
+        for team, config in settings.TEAMS.items()
+    })
 
-        return jsonify({
-            "metadata": metadata,
-            "partidos_completos": matches,
-            "resumen": {
-                "total": len(matches),
-                "finalizados": sum(1 for m in matches if m["status"] == "FINISHED"),
-                "proximos": sum(1 for m in matches if m["status"] == "SCHEDULED"),
-                "en_vivo": sum(1 for m in matches if m["status"] == "LIVE") if any("LIVE" in m["status"] for m in matches) else 0
-            }
-        })
 
+@app.route("/calendar.ics", methods=["GET"])
+def calendar_ics():
+    try:
+        snapshot, artifact = store_for(request.args).calendar(parse_tz(request.args))
+    except KeyError as e:
+        return jsonify({"error": f"Equipo desconocido: {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    response = cached_response(artifact, "text/calendar", "public, max-age=300", snapshot.refreshed_at)
+    team = request.args.get("team", settings.DEFAULT_TEAM)
+    response.headers["Content-Disposition"] = f'inline; filename="{team}.ics"'
+    return response
+
 
 @app.route("/api/status", methods=["GET"])
 def status():
     return jsonify({
         "estado": "OK",
         "mensaje": "API funcionando correctamente",
-        "hora": datetime.now(pytz.timezone("America/Guatemala")).isoformat()
+        "hora": datetime.now(pytz.timezone(settings.TIMEZONE)).isoformat()
     })
 
 
+@app.route("/api/health", methods=["GET"])
+def health():
+    """Comprobación barata para Render: solo mira la antigüedad del snapshot, nunca hace scraping"""
+    store = registry.store(settings.DEFAULT_TEAM, settings.DEFAULT_SEASON)
+    snapshot = store.current()
+    now = datetime.now(pytz.timezone(settings.TIMEZONE))
+    uptime = time.monotonic() - STARTED_AT
+
+    if snapshot is None:
+        # Recién arrancado sin snapshot en disco: el primer refresco aún está en curso
+        healthy = uptime < settings.HEALTH_STARTUP_GRACE_SECONDS
+        body = {"estado": "iniciando" if healthy else "sin_datos", "segundos_activo": round(uptime)}
+    else:
+        checked = store.last_checked or snapshot.refreshed_at
+        age = (now - checked).total_seconds()
+        fresh = age <= settings.HEALTH_MAX_AGE_SECONDS
+        # Un snapshot antiguo cargado de disco no tumba el arranque: el refresco ya está programado
+        healthy = fresh or uptime < settings.HEALTH_STARTUP_GRACE_SECONDS
+        body = {
+            "estado": "OK" if fresh else ("iniciando" if healthy else "obsoleto"),
+            "ultima_comprobacion": checked.isoformat(),
+            "antiguedad_segundos": round(age),
+            "datos_obsoletos": snapshot.stale,
+            "generacion": snapshot.generation
+        }
+
+    response = jsonify(body)
+    response.headers["Cache-Control"] = "no-store"
+    return response, 200 if healthy else 503
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Métricas del worker que atiende la petición: con varios workers de gunicorn cada uno tiene las
+    suyas (Prometheus debe sumar las series de todos)"""
+    response = Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+    response.headers["X-Worker-Pid"] = str(os.getpid())
+    return response
+
+
+@app.route("/debug/profile", methods=["GET"])
+def get_profile():
+    """Pilas colapsadas del profiler por muestreo del worker que atiende la petición (requiere
+    PROFILER_ENABLED y, si existe, PROFILER_TOKEN); X-Worker-Pid indica de qué worker son"""
+    if profiler is None:
+        return jsonify({"error": "Profiler desactivado (PROFILER_ENABLED)"}), 404
+    if settings.PROFILER_TOKEN and request.args.get("token") != settings.PROFILER_TOKEN:
+        return jsonify({"error": "Token inválido"}), 403
+    response = Response(profiler.collapsed(reset=request.args.get("reset") == "1"), mimetype="text/plain")
+    response.headers["X-Worker-Pid"] = str(os.getpid())
+    return response
+
+
+# Arranque en caliente: el último snapshot guardado se sirve mientras llega el refresco
+registry.warm_load()
+if settings.SCHEDULER_ENABLED:
+    registry.start()
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
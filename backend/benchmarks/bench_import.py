@@ -0,0 +1,74 @@
+# archivo: benchmarks/bench_import.py - Tiempo de importación de la app (arranque en frío)
+#
+# Uso (desde backend/):  python benchmarks/bench_import.py [--repeat 10] [--top 10]
+#
+# Cada medición es un intérprete nuevo, como en un arranque tras spin-down en Render.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Arranque actual (scraper diferido) frente a importar también el stack de scraping
+SCENARIOS = {
+    'app': 'import app',
+    'app + scraper': 'import app, fotmob_scraper'
+}
+
+ENV = {
+    **os.environ,
+    'SCHEDULER_ENABLED': 'false',
+    'PERSIST_SNAPSHOTS': 'false',
+    'PYTHONDONTWRITEBYTECODE': '1'
+}
+
+
+def run(code, importtime=False):
+    """(ms de pared, stderr) de un intérprete que ejecuta code"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=ENV, capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000, result.stderr
+
+
+def top_imports(stderr, top):
+    """Módulos con más tiempo acumulado según -X importtime (hasta un nivel de anidación)"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Módulos importados por el script y sus importaciones directas (sangría de 0 o 2 espacios)
+        depth = len(name) - len(name.lstrip()) - 1
+        if depth <= 2:
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del tiempo de importación de la app')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    medians = {}
+    for name, code in SCENARIOS.items():
+        run(code)  # calentar la caché de disco
+        timings = [run(code)[0] for _ in range(args.repeat)]
+        medians[name] = statistics.median(timings)
+        print(f"{name:<15} mediana {medians[name]:8.1f} ms  min {min(timings):8.1f} ms")
+
+        _, stderr = run(code, importtime=True)
+        for cumulative, module in top_imports(stderr, args.top):
+            print(f"    {cumulative:8.1f} ms  {module}")
+
+    saved = medians['app + scraper'] - medians['app']
+    print(f"Ahorro al diferir el scraper: {saved:.1f} ms ({saved / medians['app + scraper']:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# archivo: benchmarks/bench_parser.py - Comparativa de parsers de Transfermarkt (bs4 vs lxml)
+#
+# Uso (desde backend/):  python benchmarks/bench_parser.py [--repeat 20]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'fixtures')
+sys.path.insert(0, BACKEND_DIR)
+
+from bs4 import BeautifulSoup
+
+from fotmob_scraper_backup import FotMobScraper
+
+
+def load_fixtures():
+    """Páginas HTML guardadas en benchmarks/fixtures"""
+    fixtures = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, name), 'rb') as fh:
+                fixtures[name] = fh.read()
+    return fixtures
+
+
+def measure(fn, repeat):
+    """Tiempos (ms) de repeat ejecuciones de fn"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de parsers de Transfermarkt')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    scraper = FotMobScraper()
+    engines = {
+        'bs4': lambda content: scraper.parse_transfermarkt_page(BeautifulSoup(content, 'html.parser')),
+        'lxml': scraper.parse_transfermarkt_html
+    }
+
+    for name, content in load_fixtures().items():
+        print(f"{name} ({len(content) / 1024:.1f} KiB)")
+        medians = {}
+        for engine, parse in engines.items():
+            found = len(scraper.page_matches(parse(content)))
+            timings = measure(lambda: parse(content), args.repeat)
+            medians[engine] = statistics.median(timings)
+            print(f"  {engine:<5} mediana {medians[engine]:8.2f} ms  min {min(timings):8.2f} ms  partidos {found}")
+        print(f"  speedup lxml vs bs4: x{medians['bs4'] / medians['lxml']:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+# archivo: benchmarks/run_benchmarks.py - Suite de benchmarks: parseo, snapshot, serialización y API
+#
+# Uso (desde backend/):
+#   python benchmarks/run_benchmarks.py --output informe.json
+#   python benchmarks/run_benchmarks.py --compare informe-anterior.json --threshold 0.15
+#
+# El informe JSON incluye el commit y los tiempos por benchmark; --compare sale con código 1 si
+# algún benchmark empeora su mediana más que --threshold respecto al informe indicado.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+# La app se importa sin scheduler ni disco: los datos los pone el propio benchmark
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('PERSIST_SNAPSHOTS', 'false')
+os.environ.setdefault('SINGLEFLIGHT_LOCK_FILES', 'false')
+
+from bs4 import BeautifulSoup
+
+from bench_parser import load_fixtures
+from fotmob_scraper_backup import FotMobScraper
+from ics_feed import IcsRenderer
+from season_synthesis import synthesize_matches
+from serialization import dumps
+from snapshot import Snapshot, build_summary, diff_matches
+from standings import StandingsEngine
+
+
+def measure(fn, repeat, warmup=1):
+    """Tiempos (ms) de repeat ejecuciones de fn tras warmup ejecuciones descartadas"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings, items=None):
+    """Estadísticas de una serie de tiempos; items permite calcular el rendimiento por elemento"""
+    ordered = sorted(timings)
+    result = {
+        'repeat': len(timings),
+        'median_ms': round(statistics.median(ordered), 4),
+        'min_ms': round(ordered[0], 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4)
+    }
+    if items:
+        result['items'] = items
+        result['items_per_sec'] = round(items / (result['median_ms'] / 1000), 1) if result['median_ms'] else None
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_parsers(results, repeat):
+    """Parser de Transfermarkt (bs4 y lxml) sobre las páginas guardadas"""
+    scraper = FotMobScraper()
+    engines = {
+        'bs4': lambda content: scraper.parse_transfermarkt_page(BeautifulSoup(content, 'html.parser')),
+        'lxml': scraper.parse_transfermarkt_html
+    }
+    for name, content in load_fixtures().items():
+        fixture = os.path.splitext(name)[0]
+        for engine, parse in engines.items():
+            results[f"parse.{engine}.{fixture}"] = summarize(measure(lambda: parse(content), repeat))
+
+
+def serialize_fragments(matches):
+    """Cuerpo de /api/matches en frío: se descartan los fragmentos JSON memoizados"""
+    for match in matches:
+        match.json_cache = None
+    return b','.join(match.to_json() for match in matches)
+
+
+def bench_pipeline(results, raw_matches, repeat):
+    """Conversión, diff, resumen, deduplicado, serialización e ICS sobre un conjunto sintético"""
+    n = len(raw_matches)
+    scraper = FotMobScraper()
+    matches, _ = diff_matches({}, raw_matches)
+    snapshot = Snapshot(matches, datetime.now(timezone.utc))
+    changed = [dict(match, attendance=match['attendance'] + 1) if i % 50 == 0 else match
+               for i, match in enumerate(raw_matches)]
+
+    cases = {
+        'snapshot.build': lambda: diff_matches({}, raw_matches),
+        'snapshot.diff_2pct': lambda: diff_matches(snapshot.by_id, changed),
+        'summary': lambda: build_summary(snapshot.matches),
+        'remove_duplicates': lambda: scraper.remove_duplicates(raw_matches + raw_matches[:n // 10]),
+        'serialize.dumps_dicts': lambda: dumps([match.to_dict() for match in snapshot.matches]),
+        'serialize.json_fragments': lambda: serialize_fragments(snapshot.matches),
+        'index.build_query': lambda: Snapshot(snapshot.matches, snapshot.refreshed_at).index.query(
+            status='finished', limit=50
+        ),
+        'ics.render_cold': lambda: IcsRenderer().render(snapshot.matches, snapshot.refreshed_at),
+        'standings.rebuild': lambda: StandingsEngine().apply('bench', 'bench', snapshot)
+    }
+    for name, fn in cases.items():
+        results[f"{name}.{n}"] = summarize(measure(fn, repeat), items=n)
+
+
+def bench_api(results, raw_matches, repeat, requests_per_run):
+    """Rendimiento del test client de Flask en /api/matches y /api/status"""
+    import app as app_module
+
+    app_module.registry.fetcher = lambda team, season: raw_matches
+    store = app_module.registry.store(app_module.settings.DEFAULT_TEAM, app_module.settings.DEFAULT_SEASON)
+    store.refresh()
+    client = app_module.app.test_client()
+    n = len(raw_matches)
+
+    def run(path, headers=None, cold=False):
+        def fn():
+            for _ in range(requests_per_run):
+                if cold:
+                    # Sin respuestas serializadas: cuerpo, ETag y compresión desde cero
+                    store.get().artifacts.clear()
+                response = client.get(path, headers=headers or {})
+                assert response.status_code in (200, 304), (path, response.status_code)
+        return fn
+
+    etag = client.get('/api/matches').headers['ETag']
+    cases = {
+        f"api.matches.cold.{n}": run('/api/matches', cold=True),
+        f"api.matches.warm.{n}": run('/api/matches'),
+        f"api.matches.gzip.{n}": run('/api/matches', headers={'Accept-Encoding': 'gzip'}),
+        f"api.matches.304.{n}": run('/api/matches', headers={'If-None-Match': etag}),
+        f"api.matches.query.{n}": run('/api/matches?status=finished&limit=50&fields=id,date,home_team,away_team'),
+        f"api.matches.tz.{n}": run('/api/matches?tz=Europe/London'),
+        'api.status': run('/api/status')
+    }
+    for name, fn in cases.items():
+        results[name] = summarize(measure(fn, repeat), items=requests_per_run)
+
+
+def compare(report, baseline, threshold, out):
+    """Imprimir la variación de medianas; devuelve los benchmarks que empeoran más que threshold"""
+    regressions = []
+    print(f"\nComparación con {baseline.get('commit') or 'informe anterior'}:", file=out)
+    for name, current in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None or not previous['median_ms']:
+            print(f"  {name:<40} (nuevo)", file=out)
+            continue
+        change = current['median_ms'] / previous['median_ms'] - 1
+        flag = '  ⚠️ regresión' if change > threshold else ''
+        print(f"  {name:<40} {previous['median_ms']:10.3f} -> {current['median_ms']:10.3f} ms  {change:+7.1%}{flag}",
+              file=out)
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suite de benchmarks del backend')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--sizes', default='1000,10000', help='tamaños de los conjuntos sintéticos')
+    parser.add_argument('--requests', type=int, default=20, help='peticiones por medición en la API')
+    parser.add_argument('--only', default='', help='grupos a ejecutar: parse,pipeline,api')
+    parser.add_argument('--output', help='ruta del informe JSON (por defecto, salida estándar)')
+    parser.add_argument('--compare', help='informe JSON anterior con el que comparar')
+    parser.add_argument('--threshold', type=float, default=0.10, help='empeoramiento tolerado (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    groups = set(filter(None, args.only.split(','))) or {'parse', 'pipeline', 'api'}
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = {}
+
+    if 'parse' in groups:
+        bench_parsers(results, args.repeat)
+    datasets = {}
+    for size in sizes:
+        # Ligas de 20 equipos: 380 partidos por liga; se recorta al tamaño pedido
+        teams = 20 * max(1, -(-size // 380))
+        datasets[size] = list(synthesize_matches(teams=teams, seed=size))[:size]
+    if 'pipeline' in groups:
+        for size in sizes:
+            bench_pipeline(results, datasets[size], args.repeat)
+    if 'api' in groups and sizes:
+        bench_api(results, datasets[sizes[-1]], args.repeat, args.requests)
+
+    report = {
+        'commit': git_commit(),
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'parametros': {'repeat': args.repeat, 'sizes': sizes, 'requests': args.requests},
+        'results': results
+    }
+
+    # Sin --output el JSON va a la salida estándar y el resumen legible a stderr
+    out = sys.stdout if args.output else sys.stderr
+    for name, result in results.items():
+        rate = f"  {result['items_per_sec']:>12,.0f}/s" if result.get('items_per_sec') else ''
+        print(f"{name:<40} mediana {result['median_ms']:10.3f} ms  p95 {result['p95_ms']:10.3f} ms{rate}", file=out)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        if compare(report, baseline, args.threshold, out):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# archivo: fixture_store.py - Almacén de partidos por (equipo, temporada, competición)
+
+import threading
+from bisect import bisect_left, bisect_right
+
+from match_index import slugify
+
+
+def sort_key(match):
+    """Orden de los partidos dentro de cada índice: (fecha, hora, id)"""
+    return (match.get('date') or '', match.get('time') or '', str(match['id']))
+
+
+class _SortedMatches:
+    """Lista de partidos ordenada con sus claves en paralelo para búsquedas binarias"""
+
+    __slots__ = ('keys', 'matches')
+
+    def __init__(self, matches=()):
+        ordered = sorted(matches, key=sort_key)
+        self.keys = [sort_key(m) for m in ordered]
+        self.matches = ordered
+
+    def insert(self, match):
+        key = sort_key(match)
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.matches.insert(position, match)
+
+    def remove(self, match):
+        position = bisect_left(self.keys, sort_key(match))
+        if position < len(self.keys) and self.matches[position] is match:
+            del self.keys[position]
+            del self.matches[position]
+
+    def __len__(self):
+        return len(self.matches)
+
+
+class FixtureStore:
+    """Partidos de varios equipos y temporadas con índices secundarios por fecha e id
+
+    La memoria la acota SnapshotRegistry, que solo acepta las temporadas de settings.SEASONS.
+    """
+
+    def __init__(self):
+        self._partitions = {}   # (equipo, temporada, competición) -> _SortedMatches
+        self._by_date = {}      # (equipo, temporada) -> _SortedMatches con todas las competiciones
+        self._by_id = {}        # id -> {(equipo, temporada): partido}
+        self._seasons = {}      # equipo -> temporadas cargadas, ordenadas
+        self._lock = threading.Lock()
+
+    def replace(self, team, season, matches):
+        """Sustituir todos los partidos de (equipo, temporada)"""
+        with self._lock:
+            self._drop(team, season)
+
+            ordered = _SortedMatches(matches)
+            self._by_date[(team, season)] = ordered
+            partitions = {}
+            for match in ordered.matches:
+                partitions.setdefault(slugify(match.get('competition')), []).append(match)
+                self._by_id.setdefault(match['id'], {})[(team, season)] = match
+            for competition, competition_matches in partitions.items():
+                self._partitions[(team, season, competition)] = _SortedMatches(competition_matches)
+
+            self._register_season(team, season)
+
+    def apply(self, team, season, snapshot, diff=None):
+        """Aplicar solo los partidos añadidos/modificados/eliminados de un snapshot nuevo"""
+        if diff is None or (team, season) not in self._by_date:
+            self.replace(team, season, snapshot.matches)
+            return
+
+        with self._lock:
+            key = (team, season)
+            for match_id in diff.removed + diff.changed:
+                old = self._by_id.get(match_id, {}).pop(key, None)
+                if old is not None:
+                    self._unindex(team, season, old)
+                    if not self._by_id[match_id]:
+                        del self._by_id[match_id]
+
+            for match_id in diff.changed + diff.added:
+                match = snapshot.by_id[match_id]
+                self._by_date[key].insert(match)
+                competition = (team, season, slugify(match.get('competition')))
+                self._partitions.setdefault(competition, _SortedMatches()).insert(match)
+                self._by_id.setdefault(match_id, {})[key] = match
+
+            self._register_season(team, season)
+
+    def _unindex(self, team, season, match):
+        """Quitar un partido de los índices por fecha y competición (con el lock tomado)"""
+        self._by_date[(team, season)].remove(match)
+        competition = (team, season, slugify(match.get('competition')))
+        partition = self._partitions.get(competition)
+        if partition is not None:
+            partition.remove(match)
+            if not partition:
+                del self._partitions[competition]
+
+    def _register_season(self, team, season):
+        """Anotar la temporada entre las cargadas del equipo (con el lock tomado)"""
+        seasons = self._seasons.setdefault(team, [])
+        if season not in seasons:
+            seasons.append(season)
+            seasons.sort()
+
+    def _drop(self, team, season):
+        """Eliminar (equipo, temporada) de todos los índices (con el lock tomado)"""
+        for key in [k for k in self._partitions if k[0] == team and k[1] == season]:
+            del self._partitions[key]
+        ordered = self._by_date.pop((team, season), None)
+        for match in ordered.matches if ordered is not None else []:
+            owners = self._by_id.get(match['id'])
+            if owners is not None:
+                owners.pop((team, season), None)
+                if not owners:
+                    del self._by_id[match['id']]
+
+    def get(self, team, season, competition=None):
+        """Partidos de (equipo, temporada), opcionalmente de una sola competición"""
+        if competition is None:
+            ordered = self._by_date.get((team, season))
+        else:
+            ordered = self._partitions.get((team, season, slugify(competition)))
+        return list(ordered.matches) if ordered is not None else []
+
+    def between(self, team, season, date_from, date_to):
+        """Partidos entre dos fechas (YYYY-MM-DD, inclusivas) por búsqueda binaria"""
+        ordered = self._by_date.get((team, season))
+        if ordered is None:
+            return []
+        start = bisect_left(ordered.keys, (date_from,))
+        end = bisect_right(ordered.keys, (date_to, '￿'))
+        return ordered.matches[start:end]
+
+    def find(self, match_id, team=None, season=None):
+        """Partido por id; si varios equipos comparten id, se filtra por equipo/temporada"""
+        owners = self._by_id.get(match_id, {})
+        for (owner_team, owner_season), match in owners.items():
+            if (team is None or owner_team == team) and (season is None or owner_season == season):
+                return match
+        return None
+
+    def competitions(self, team, season):
+        """Competiciones conocidas de (equipo, temporada)"""
+        return sorted(k[2] for k in self._partitions if k[0] == team and k[1] == season)
+
+    def seasons(self, team):
+        """Temporadas cargadas de un equipo"""
+        return list(self._seasons.get(team, []))
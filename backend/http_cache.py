@@ -0,0 +1,106 @@
+# archivo: http_cache.py - Caché en disco para peticiones condicionales (ETag/Last-Modified)
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import settings
+
+
+class HttpCache:
+    """Guarda por URL los validadores, el cuerpo y opcionalmente el resultado ya parseado
+
+    El resultado parseado solo debe contener datos que no dependan del día en que se parseó: se
+    reutiliza tal cual ante cada 304, quizá días después.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, url, suffix):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{suffix}")
+
+    def _read_meta(self, url):
+        try:
+            with open(self._path(url, 'meta.json'), 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, data):
+        """Escritura atómica para no dejar entradas a medias tras un reinicio"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+
+    def validators(self, url):
+        """Cabeceras If-None-Match / If-Modified-Since para la URL"""
+        meta = self._read_meta(url)
+        if not meta:
+            return {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Guardar cuerpo y validadores de una respuesta 200"""
+        try:
+            self._write(self._path(url, 'body'), response.content)
+            meta = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            self._write(self._path(url, 'meta.json'), json.dumps(meta).encode('utf-8'))
+            # El resultado parseado corresponde al cuerpo anterior
+            try:
+                os.remove(self._path(url, 'parsed.json'))
+            except FileNotFoundError:
+                pass
+        except OSError as e:
+            logging.warning(f"⚠️ No se pudo guardar en caché {url}: {e}")
+
+    def load_body(self, url):
+        """Último cuerpo válido guardado para la URL"""
+        try:
+            with open(self._path(url, 'body'), 'rb') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def store_parsed(self, url, version, data):
+        """Guardar el resultado del parser (sin fechas relativas a hoy) para reutilizarlo ante un 304"""
+        try:
+            payload = json.dumps({'version': version, 'data': data}, ensure_ascii=False)
+            self._write(self._path(url, 'parsed.json'), payload.encode('utf-8'))
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"⚠️ No se pudo guardar resultado parseado de {url}: {e}")
+
+    def load_parsed(self, url, version):
+        """Resultado parseado del cuerpo en caché, si lo generó la misma versión del parser"""
+        try:
+            with open(self._path(url, 'parsed.json'), 'r', encoding='utf-8') as fh:
+                payload = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        return payload['data'] if payload.get('version') == version else None
+
+
+_cache = None
+
+
+def get_http_cache():
+    """Caché compartida por todo el proceso"""
+    global _cache
+    if _cache is None:
+        _cache = HttpCache(settings.HTTP_CACHE_DIR)
+    return _cache
@@ -0,0 +1,114 @@
+# archivo: http_client.py - Cliente HTTP compartido con pool keep-alive y reintentos
+
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import settings
+
+# Respuestas que merece la pena reintentar
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class HttpClient:
+    """Session de requests con pool de conexiones, backoff exponencial con jitter y límite por host"""
+
+    def __init__(self, connect_timeout=None, read_timeout=None, retries=None,
+                 backoff=None, max_backoff=8.0, per_host_limit=None, pool_size=10, total_timeout=None):
+        self.connect_timeout = connect_timeout or settings.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.HTTP_READ_TIMEOUT
+        self.total_timeout = total_timeout or settings.HTTP_TOTAL_TIMEOUT
+        self.retries = settings.HTTP_RETRIES if retries is None else retries
+        self.backoff = settings.HTTP_BACKOFF_SECONDS if backoff is None else backoff
+        self.max_backoff = max_backoff
+        self.per_host_limit = per_host_limit or settings.HTTP_PER_HOST_LIMIT
+
+        # Los reintentos se gestionan aquí para poder aplicar jitter y el límite por host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._host_slots = {}
+        self._slots_lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, timeout=None, total_timeout=None):
+        """GET con reintentos acotados; devuelve la última respuesta o lanza la última excepción
+
+        total_timeout limita el tiempo de la URL completa (intentos, backoff y espera por el host):
+        cada intento recibe como timeout lo que quede de ese plazo.
+        """
+        connect_timeout, read_timeout = timeout or (self.connect_timeout, self.read_timeout)
+        deadline = time.monotonic() + min(total_timeout or self.total_timeout, self.total_timeout)
+        slot = self._host_slot(url)
+
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not slot.acquire(timeout=remaining):
+                raise requests.Timeout(f"Plazo agotado para {url}")
+            try:
+                remaining = max(0.001, deadline - time.monotonic())
+                response = self.session.get(
+                    url, headers=headers, params=params,
+                    timeout=(min(connect_timeout, remaining), min(read_timeout, remaining))
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                error = None
+            finally:
+                slot.release()
+
+            if error is not None:
+                delay = self._backoff_delay(attempt)
+                if attempt >= self.retries or time.monotonic() + delay >= deadline:
+                    raise error
+                logging.info(f"🔁 Reintentando {url} tras error: {error}")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                delay = self._backoff_delay(attempt, response.headers.get('Retry-After'))
+                if time.monotonic() + delay >= deadline:
+                    return response
+                logging.info(f"🔁 Reintentando {url} tras HTTP {response.status_code}")
+                response.close()
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def _host_slot(self, url):
+        """Semáforo que limita las peticiones simultáneas a un mismo host"""
+        host = urlsplit(url).netloc
+        with self._slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+        return slot
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Backoff exponencial con jitter completo; respeta Retry-After numérico"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Cliente compartido por todo el proceso para reutilizar las conexiones"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -0,0 +1,157 @@
+# archivo: ics_feed.py - Feed iCalendar (/calendar.ics) con caché por evento
+
+import threading
+from datetime import datetime, timedelta
+import pytz
+
+import settings
+from metrics import CACHE_REQUESTS, stage
+from timezones import clock, get_zone, kickoff_epoch
+
+# Duración aproximada de un partido en el calendario
+MATCH_DURATION = timedelta(hours=2)
+
+CALENDAR_HEADER = (
+    'BEGIN:VCALENDAR\r\n'
+    'VERSION:2.0\r\n'
+    'PRODID:-//Calendario Castilla//ES\r\n'
+    'CALSCALE:GREGORIAN\r\n'
+    'METHOD:PUBLISH\r\n'
+    'X-WR-CALNAME:{name}\r\n'
+    'X-WR-TIMEZONE:{timezone}\r\n'
+    'REFRESH-INTERVAL;VALUE=DURATION:PT1H\r\n'
+)
+CALENDAR_FOOTER = b'END:VCALENDAR\r\n'
+
+# Campos que aparecen en el VEVENT: si no cambian, se reutilizan los bytes ya renderizados
+EVENT_FIELDS = ('date', 'time', 'madrid_time', 'home_team', 'away_team', 'competition',
+                'venue', 'status', 'result')
+
+
+def escape_text(value):
+    """Escapar texto según RFC 5545"""
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def fold_line(line):
+    """Plegar líneas a 75 octetos como exige RFC 5545"""
+    raw = line.encode('utf-8')
+    if len(raw) <= 75:
+        return raw + b'\r\n'
+
+    parts = []
+    current = b''
+    limit = 75
+    for ch in line:
+        encoded = ch.encode('utf-8')
+        if len(current) + len(encoded) > limit:
+            parts.append(current)
+            current = b' '
+            limit = 75
+        current += encoded
+    parts.append(current)
+    return b'\r\n'.join(parts) + b'\r\n'
+
+
+def match_day(value):
+    """date de un 'YYYY-MM-DD' (None si no se puede leer)"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+class IcsRenderer:
+    """Renderiza el calendario reutilizando los VEVENT de partidos que no han cambiado"""
+
+    def __init__(self, timezone=settings.TIMEZONE, name=None):
+        name = name or settings.TEAMS[settings.DEFAULT_TEAM]['name']
+        self.header = b''.join(
+            fold_line(line) for line in CALENDAR_HEADER.format(name=escape_text(name), timezone=timezone).splitlines()
+        )
+        # Fuera de la zona del servidor, la descripción incluye también la hora local de esa zona
+        self.clock = clock(timezone) if timezone != settings.TIMEZONE else None
+        self._events = {}  # id -> (huella, (bytes antes de DTSTAMP, bytes después de DTSTAMP) o None)
+        self._lock = threading.Lock()
+
+    def render(self, matches, stamp):
+        """Bytes del VCALENDAR completo para la lista de partidos
+
+        stamp (el refreshed_at del snapshot) es el DTSTAMP de todos los eventos: el cuerpo, y con él
+        el ETag, solo depende de los datos, no del worker ni del momento en que se renderiza.
+        """
+        parts = [self.header]
+        seen = set()
+        stamp_line = fold_line(f"DTSTAMP:{stamp.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')}")
+
+        hits = 0
+        with self._lock, stage('ics'):
+            for match in matches:
+                match_id = match['id']
+                if match_id in seen:
+                    continue
+                seen.add(match_id)
+
+                fingerprint = tuple(match.get(field) for field in EVENT_FIELDS)
+                cached = self._events.get(match_id)
+                if cached is None or cached[0] != fingerprint:
+                    cached = (fingerprint, self.render_event(match))
+                    self._events[match_id] = cached
+                else:
+                    hits += 1
+                if cached[1] is not None:
+                    parts.extend((cached[1][0], stamp_line, cached[1][1]))
+
+            # Olvidar eventos de partidos que ya no existen
+            for match_id in self._events.keys() - seen:
+                del self._events[match_id]
+
+        CACHE_REQUESTS.inc(hits, cache='ics', result='hit')
+        CACHE_REQUESTS.inc(len(seen) - hits, cache='ics', result='miss')
+        parts.append(CALENDAR_FOOTER)
+        return b''.join(parts)
+
+    def render_event(self, match):
+        """(bytes anteriores, bytes posteriores) a la línea DTSTAMP del VEVENT de un partido
+
+        Sin hora legible el evento ocupa el día completo; sin fecha legible no hay evento (None).
+        """
+        kickoff = getattr(match, 'kickoff', None)
+        if kickoff is None:
+            kickoff = kickoff_epoch(match.get('date'), match.get('time'), get_zone(settings.TIMEZONE))
+        if kickoff is not None:
+            start = datetime.fromtimestamp(kickoff, pytz.utc)
+            dates = [
+                f"DTSTART:{start.strftime('%Y%m%dT%H%M%SZ')}",
+                f"DTEND:{(start + MATCH_DURATION).strftime('%Y%m%dT%H%M%SZ')}"
+            ]
+        else:
+            day = match_day(match.get('date'))
+            if day is None:
+                return None
+            dates = [
+                f"DTSTART;VALUE=DATE:{day.strftime('%Y%m%d')}",
+                f"DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime('%Y%m%d')}"
+            ]
+
+        if match.get('result'):
+            summary = f"{match['home_team']} {match['result']} {match['away_team']}"
+        else:
+            summary = f"{match['home_team']} vs {match['away_team']}"
+
+        description = f"{match['competition']}\nHora Madrid: {match.get('madrid_time') or '-'}"
+        if self.clock is not None and kickoff is not None:
+            description += f"\nHora local: {self.clock.local(kickoff)[1]}"
+        status = 'CANCELLED' if str(match.get('status', '')).upper() == 'CANCELLED' else 'CONFIRMED'
+
+        head = ['BEGIN:VEVENT', f"UID:{match['id']}@calendario-castilla"]
+        tail = [
+            *dates,
+            f"SUMMARY:{escape_text(summary)}",
+            f"LOCATION:{escape_text(match.get('venue') or '')}",
+            f"DESCRIPTION:{escape_text(description)}",
+            f"STATUS:{status}",
+            'END:VEVENT'
+        ]
+        return b''.join(fold_line(line) for line in head), b''.join(fold_line(line) for line in tail)
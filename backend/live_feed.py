@@ -0,0 +1,130 @@
+# archivo: live_feed.py - Deltas en vivo (marcador, estado, goles y tarjetas) servidos por SSE
+
+import itertools
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+import pytz
+
+import settings
+from refresh_policy import in_live_window
+
+
+def match_delta(match, previous=None):
+    """Delta de un partido: marcador y estado completos, solo los goles y tarjetas nuevos"""
+    previous_goals = (previous.goalscorers or ()) if previous is not None else ()
+    previous_cards = (previous.cards or ()) if previous is not None else ()
+    return {
+        'id': match.id,
+        'status': match.status,
+        'result': match.result,
+        'home_score': match.home_score,
+        'away_score': match.away_score,
+        'goalscorers': [event.to_dict() for event in match.goalscorers or () if event not in previous_goals],
+        'cards': [event.to_dict() for event in match.cards or () if event not in previous_cards]
+    }
+
+
+def format_event(event_id, name, data):
+    """Mensaje SSE con id (para Last-Event-ID), tipo y datos JSON"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {name}\ndata: {payload}\n\n"
+
+
+class LiveFeed:
+    """Un publicador (el refresco) y muchos suscriptores que leen de un buffer circular común
+
+    Los suscriptores no tienen hilo propio: cada conexión es un generador que espera en la
+    misma Condition (un greenlet por conexión con los workers gevent de gunicorn).
+    """
+
+    def __init__(self, timezone=settings.TIMEZONE, size=None, heartbeat_seconds=None):
+        self.timezone = pytz.timezone(timezone)
+        self.heartbeat_seconds = heartbeat_seconds or settings.LIVE_HEARTBEAT_SECONDS
+        self._events = deque(maxlen=size or settings.LIVE_BUFFER_SIZE)
+        self._sequence = itertools.count(1)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self.subscribers = 0
+
+    def publish(self, team, season, snapshot, diff, previous=None):
+        """Encolar los deltas de los partidos añadidos o modificados que están en juego"""
+        if diff is None or diff.empty:
+            return 0
+
+        now = datetime.now(self.timezone)
+        # find() en lugar de by_id: en un seguidor solo se decodifican los partidos del diff
+        deltas = []
+        for match_id in itertools.chain(diff.added, diff.changed):
+            match = snapshot.find(match_id)
+            before = previous.find(match_id) if previous is not None else None
+            # También se emite el último delta de un partido que sale de la ventana (p. ej. a FINISHED)
+            if match is None or not (in_live_window(match, now) or (before is not None and in_live_window(before, now))):
+                continue
+            deltas.append(match_delta(match, before))
+
+        if not deltas:
+            return 0
+
+        with self._condition:
+            for delta in deltas:
+                event_id = next(self._sequence)
+                self._events.append((event_id, team, season, delta))
+                self._last_id = event_id
+            self._condition.notify_all()
+
+        logging.info(f"📡 {len(deltas)} deltas en vivo publicados ({team} {season})")
+        return len(deltas)
+
+    def _pending(self, last_id, team, season):
+        """Eventos del buffer posteriores a last_id para (equipo, temporada)"""
+        return [
+            (event_id, delta) for event_id, event_team, event_season, delta in self._events
+            if event_id > last_id and event_team == team and event_season == season
+        ]
+
+    def live_matches(self, snapshot):
+        """Estado actual de los partidos en juego, enviado al conectarse"""
+        now = datetime.now(self.timezone)
+        return [match_delta(match) for match in snapshot.matches if in_live_window(match, now)]
+
+    def subscribe(self, team, season, snapshot, last_event_id=None):
+        """Generador de mensajes SSE: estado inicial, deltas y comentarios de keep-alive"""
+        with self._condition:
+            self.subscribers += 1
+            cursor = self._last_id
+            # Reconexión: reenviar lo que se perdió si sigue en el buffer
+            resume = (
+                last_event_id is not None and last_event_id <= self._last_id
+                and (not self._events or self._events[0][0] <= last_event_id + 1)
+            )
+
+        try:
+            yield f"retry: {settings.LIVE_RETRY_MS}\n\n"
+            if resume:
+                cursor = last_event_id
+            else:
+                yield format_event(cursor, 'snapshot', {
+                    'generacion': snapshot.generation,
+                    'partidos': self.live_matches(snapshot)
+                })
+
+            while True:
+                with self._condition:
+                    pending = self._pending(cursor, team, season)
+                    if not pending and self._last_id <= cursor:
+                        self._condition.wait(self.heartbeat_seconds)
+                        pending = self._pending(cursor, team, season)
+                    cursor = max(cursor, self._last_id)
+
+                if not pending:
+                    yield ": ping\n\n"
+                    continue
+                for event_id, delta in pending:
+                    yield format_event(event_id, 'delta', delta)
+        finally:
+            with self._condition:
+                self.subscribers -= 1
@@ -0,0 +1,99 @@
+# archivo: match_index.py - Índices por snapshot para filtrar y paginar /api/matches
+
+import base64
+import json
+import re
+from bisect import bisect_left, bisect_right
+
+from matching import fold
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def slugify(text):
+    """'Primera Federación' -> 'primera-federacion'"""
+    return _NON_ALNUM.sub('-', fold(text or '')).strip('-')
+
+
+def encode_cursor(key):
+    """Cursor opaco a partir de la clave (fecha, hora, id) del último partido devuelto"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Clave (fecha, hora, id) codificada en un cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, time, match_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (str(date), str(time), str(match_id))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+
+
+class MatchIndex:
+    """Partidos ordenados por fecha con índices por competición y estado (posiciones ordenadas)"""
+
+    def __init__(self, matches):
+        self.matches = sorted(matches, key=self._key)
+        self.keys = [self._key(m) for m in self.matches]
+        self.dates = [key[0] for key in self.keys]
+
+        self.by_competition = {}
+        self.by_status = {}
+        for position, match in enumerate(self.matches):
+            self.by_competition.setdefault(slugify(match.get('competition')), []).append(position)
+            self.by_status.setdefault(str(match.get('status', '')).upper(), []).append(position)
+
+        self._competition_sets = {k: frozenset(v) for k, v in self.by_competition.items()}
+        self._status_sets = {k: frozenset(v) for k, v in self.by_status.items()}
+
+    @staticmethod
+    def _key(match):
+        return (match.get('date') or '', match.get('time') or '', str(match.get('id', '')))
+
+    def query(self, competition=None, status=None, date_from=None, date_to=None, after=None, limit=None):
+        """(partidos, clave del último devuelto si hay más páginas) sin recorrer todo el snapshot"""
+        for value in (date_from, date_to):
+            if value and not _DATE.match(value):
+                raise ValueError(f"Fecha inválida: {value} (formato YYYY-MM-DD)")
+
+        # Rango de posiciones por fecha (búsqueda binaria)
+        start = bisect_left(self.dates, date_from) if date_from else 0
+        end = bisect_right(self.dates, date_to) if date_to else len(self.matches)
+        if after is not None:
+            start = max(start, bisect_right(self.keys, after))
+
+        # Se recorre el índice más pequeño y se comprueban los demás por pertenencia
+        candidates = range(start, end)
+        checks = []
+        for value, lists, sets in ((competition, self.by_competition, self._competition_sets),
+                                   (status, self.by_status, self._status_sets)):
+            if value is None:
+                continue
+            key = slugify(value) if lists is self.by_competition else value.upper()
+            positions = lists.get(key, [])
+            checks.append(sets.get(key, frozenset()))
+            if len(positions) < len(candidates):
+                lo, hi = bisect_left(positions, start), bisect_left(positions, end)
+                candidates = positions[lo:hi]
+
+        result = []
+        has_more = False
+        for position in candidates:
+            if all(position in check for check in checks):
+                if limit is not None and len(result) >= limit:
+                    has_more = True
+                    break
+                result.append(position)
+
+        next_key = self.keys[result[-1]] if has_more and result else None
+        return [self.matches[position] for position in result], next_key
+
+
+def project(matches, fields):
+    """Dicts de los partidos con solo los campos pedidos ('id' siempre se incluye)"""
+    if not fields:
+        return [match.to_dict() for match in matches]
+    fields = ['id'] + [f for f in fields if f != 'id']
+    return [match.to_dict(fields) for match in matches]
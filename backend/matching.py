@@ -0,0 +1,97 @@
+# archivo: matching.py - Patrones precompilados y búsqueda de rivales conocidos
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Patrones usados al recorrer filas y boxes de Transfermarkt
+DATE_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+RESULT_PATTERN = re.compile(r'(\d{1,2}):(\d{1,2})')
+TEAM_HREF_PATTERN = re.compile(r'/verein/')
+TEAM_CLASS_PATTERN = re.compile(r'club|team|verein')
+BOX_CLASS_PATTERN = re.compile(r'box')
+
+# Prefijos/sufijos que no aportan a la identidad de un equipo
+_NAME_NOISE = re.compile(r'\b(cd|sd|ud|cf|fc|rc|ca|club|de|la|el)\b')
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+
+# Otros nombres con los que aparecen los rivales en las distintas fuentes
+OPPONENT_ALIASES = {
+    'Athletic Bilbao B': ['Bilbao Athletic', 'Athletic Club B'],
+    'RC Deportivo B': ['Deportivo Fabril', 'RC Deportivo Fabril', 'Deportivo de La Coruña B'],
+    'Celta Vigo B': ['Celta Fortuna', 'RC Celta Fortuna', 'Celta B'],
+    'CA Osasuna B': ['Osasuna Promesas', 'Osasuna B'],
+    'Racing de Ferrol': ['Racing Ferrol', 'Racing Club Ferrol'],
+    'Real Avilés': ['Real Avilés Industrial'],
+    'Cultural Leonesa': ['Cultural y Deportiva Leonesa'],
+    'SD Ponferradina': ['Ponferradina']
+}
+
+
+def fold(text):
+    """Minúsculas sin acentos
+
+    La longitud puede cambiar (casefold convierte 'ß' en 'ss' y NFKD separa ligaduras como 'ﬁ'):
+    las posiciones encontradas en el resultado solo valen dentro del texto ya plegado.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_team_name(name):
+    """Clave de comparación de equipos entre fuentes (sin acentos ni prefijos)"""
+    name = _NAME_NOISE.sub(' ', _NON_ALNUM.sub(' ', fold(name or '')))
+    return ' '.join(name.split())
+
+
+def _trie_pattern(words):
+    """Regex con los prefijos comunes factorizados: cada carácter se compara una sola vez por rama"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class OpponentMatcher:
+    """Busca cualquier rival conocido (o alias) con una sola regex compilada"""
+
+    def __init__(self, names, aliases=None):
+        self.variants = {}
+        for name in names:
+            self.variants[fold(name)] = name
+        for canonical, alias_list in (aliases or {}).items():
+            if canonical in names:
+                for alias in alias_list:
+                    self.variants.setdefault(fold(alias), canonical)
+
+        self._pattern = re.compile(_trie_pattern(self.variants)) if self.variants else None
+
+    def search(self, text):
+        """(nombre canónico, posición en fold(text)) del primer rival que aparece en el texto, o None"""
+        return self.search_folded(fold(text))
+
+    def search_folded(self, folded_text):
+        """Igual que search() para un texto ya pasado por fold()"""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(folded_text)
+        if match is None:
+            return None
+        return self.variants[match.group(0)], match.start()
+
+
+@lru_cache(maxsize=32)
+def get_opponent_matcher(names):
+    """Matcher compartido para una tupla de nombres (se compila una sola vez)"""
+    return OpponentMatcher(names, OPPONENT_ALIASES)
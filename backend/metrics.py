@@ -0,0 +1,144 @@
+# archivo: metrics.py - Histogramas y contadores en formato Prometheus para /metrics
+#
+# Métricas por proceso (cada worker de gunicorn expone las suyas); sin dependencias externas.
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites (segundos) de los histogramas de latencia
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+class Counter:
+    """Contador monótono con etiquetas"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[label]) for label in self.labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}"
+
+
+class Histogram:
+    """Histograma acumulado (buckets, suma y número de observaciones) con etiquetas"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Medir la duración del bloque (también si lanza una excepción)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: ([*series[0]], series[1], series[2]) for key, series in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, ('le', _format_number(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labels, key, ('le', '+Inf'))} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {total!r}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+
+def render():
+    """Todas las métricas en el formato de texto de Prometheus (version=0.0.4)"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+# Etapas del refresco: fetch, source, merge, parse, dedupe, diff, publish, persist, serialize, compress, ics
+STAGE_SECONDS = Histogram('castilla_stage_duration_seconds', 'Duración de cada etapa del pipeline', ('stage',))
+
+REQUEST_SECONDS = Histogram(
+    'castilla_http_request_duration_seconds', 'Duración de las peticiones por ruta', ('route', 'method', 'status')
+)
+
+SOURCE_REQUESTS = Counter(
+    'castilla_source_requests_total', 'Consultas a fuentes por resultado (ok, error, timeout, skipped)',
+    ('source', 'outcome')
+)
+SOURCE_SECONDS = Histogram('castilla_source_duration_seconds', 'Latencia de cada fuente', ('source',))
+
+CACHE_REQUESTS = Counter(
+    'castilla_cache_requests_total', 'Aciertos y fallos de cada caché (artifact, http, fallback, ics)',
+    ('cache', 'result')
+)
+
+REFRESHES = Counter('castilla_refresh_total', 'Refrescos de snapshot por resultado', ('outcome',))
+
+
+def stage(name):
+    """Context manager que mide una etapa del pipeline"""
+    return STAGE_SECONDS.time(stage=name)
+
+
+def cache_result(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,169 @@
+# archivo: models.py - Representación compacta de partidos y eventos
+
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+import serialization
+import settings
+from timezones import get_zone, kickoff_epoch
+
+# Orden de los campos en la salida JSON (el mismo que generan los scrapers)
+MATCH_FIELDS = (
+    'id', 'date', 'time', 'madrid_time', 'home_team', 'away_team', 'competition', 'venue',
+    'status', 'result', 'home_score', 'away_score', 'referee', 'source', 'goalscorers', 'cards',
+    'substitutions', 'tv_broadcast', 'statistics', 'attendance', 'weather', 'match_url'
+)
+
+# Colecciones que se guardan empaquetadas y se materializan solo al serializar
+LIST_FIELDS = ('substitutions', 'tv_broadcast')
+DICT_FIELDS = ('statistics', 'weather')
+
+
+def intern(value):
+    """Compartir una única copia de cadenas muy repetidas (equipos, estadios, competiciones)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _pack_dict(data):
+    return tuple((intern(k), intern(v)) for k, v in data.items()) if data else None
+
+
+def _pack_list(items):
+    return tuple(_pack_dict(item) for item in items) if items else None
+
+
+@dataclass(slots=True)
+class Event:
+    """Gol o tarjeta de un partido"""
+
+    kind: str                     # 'goal' | 'card'
+    player_name: str
+    minute: int
+    team: str
+    detail: str                   # goal_type / card_type
+    extra: Optional[str] = None   # assist_player / reason
+
+    @classmethod
+    def from_goal(cls, data):
+        return cls('goal', intern(data.get('player_name')), data.get('minute'), intern(data.get('team')),
+                   intern(data.get('goal_type')), intern(data.get('assist_player')))
+
+    @classmethod
+    def from_card(cls, data):
+        return cls('card', intern(data.get('player_name')), data.get('minute'), intern(data.get('team')),
+                   intern(data.get('card_type')), intern(data.get('reason')))
+
+    def to_dict(self):
+        if self.kind == 'goal':
+            return {'player_name': self.player_name, 'minute': self.minute, 'team': self.team,
+                    'goal_type': self.detail, 'assist_player': self.extra}
+        return {'player_name': self.player_name, 'minute': self.minute, 'team': self.team,
+                'card_type': self.detail, 'reason': self.extra}
+
+
+@dataclass(slots=True)
+class Match:
+    """Partido con cadenas internadas y subcolecciones vacías guardadas como None"""
+
+    id: str
+    date: str
+    time: str
+    madrid_time: str
+    home_team: str
+    away_team: str
+    competition: str
+    venue: str
+    status: str
+    source: str
+    result: Optional[str] = None
+    home_score: Optional[int] = None
+    away_score: Optional[int] = None
+    referee: str = ''
+    attendance: int = 0
+    match_url: Optional[str] = None
+    goalscorers: Optional[tuple] = None
+    cards: Optional[tuple] = None
+    substitutions: Optional[tuple] = None
+    tv_broadcast: Optional[tuple] = None
+    statistics: Optional[tuple] = None
+    weather: Optional[tuple] = None
+    # Saque inicial en segundos epoch UTC: base de las horas locales de ?tz= (no se serializa)
+    kickoff: Optional[int] = None
+    # Hash del contenido de origen y JSON ya serializado (se conservan entre snapshots)
+    digest: Optional[str] = field(default=None, compare=False, repr=False)
+    json_cache: Optional[bytes] = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Convertir el dict de un scraper en un Match compacto"""
+        kickoff = data.get('kickoff')
+        if kickoff is None:
+            kickoff = kickoff_epoch(data.get('date'), data.get('time'), get_zone(settings.TIMEZONE))
+        return cls(
+            id=str(data['id']),
+            date=intern(data.get('date') or ''),
+            time=intern(data.get('time') or ''),
+            madrid_time=intern(data.get('madrid_time') or ''),
+            home_team=intern(data.get('home_team') or ''),
+            away_team=intern(data.get('away_team') or ''),
+            competition=intern(data.get('competition') or ''),
+            venue=intern(data.get('venue') or ''),
+            status=intern(data.get('status') or ''),
+            source=intern(data.get('source') or ''),
+            result=data.get('result'),
+            home_score=data.get('home_score'),
+            away_score=data.get('away_score'),
+            referee=intern(data.get('referee') or ''),
+            attendance=data.get('attendance') or 0,
+            match_url=intern(data.get('match_url')),
+            goalscorers=tuple(Event.from_goal(g) for g in data['goalscorers']) if data.get('goalscorers') else None,
+            cards=tuple(Event.from_card(c) for c in data['cards']) if data.get('cards') else None,
+            substitutions=_pack_list(data.get('substitutions')),
+            tv_broadcast=_pack_list(data.get('tv_broadcast')),
+            statistics=_pack_dict(data.get('statistics')),
+            weather=_pack_dict(data.get('weather')),
+            kickoff=kickoff
+        )
+
+    def get(self, field, default=None):
+        """Acceso estilo dict (materializa las subcolecciones)"""
+        if field not in MATCH_FIELDS:
+            return default
+        value = getattr(self, field)
+        if field in ('goalscorers', 'cards'):
+            return [event.to_dict() for event in value] if value else []
+        if field in LIST_FIELDS:
+            return [dict(item) for item in value] if value else []
+        if field in DICT_FIELDS:
+            return dict(value) if value else {}
+        return value
+
+    def __getitem__(self, field):
+        if field not in MATCH_FIELDS:
+            raise KeyError(field)
+        return self.get(field)
+
+    def __contains__(self, field):
+        return field in MATCH_FIELDS
+
+    def to_dict(self, fields=None):
+        """Dict con el mismo formato que los scrapers (o solo los campos pedidos)"""
+        data = {field: self.get(field) for field in (fields or MATCH_FIELDS) if field in MATCH_FIELDS}
+        if fields is None and self.match_url is None:
+            del data['match_url']
+        return data
+
+    def to_record(self):
+        """Dict para guardar y reconstruir el partido: to_dict() más el saque inicial y el digest de
+        origen, que to_dict() no incluye y sin los que el siguiente refresco lo daría por modificado"""
+        data = self.to_dict()
+        data['kickoff'] = self.kickoff
+        data['digest'] = self.digest
+        return data
+
+    def to_json(self):
+        """Bytes JSON del partido, serializados una sola vez por partido"""
+        if self.json_cache is None:
+            self.json_cache = serialization.dumps(self.to_dict())
+        return self.json_cache
@@ -0,0 +1,89 @@
+# archivo: persistence.py - Último snapshot de cada (equipo, temporada) guardado en SQLite
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    team TEXT NOT NULL,
+    season TEXT NOT NULL,
+    refreshed_at TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (team, season)
+)
+"""
+
+# Bases de datos creadas antes de guardar la generación
+MIGRATIONS = (
+    ('generation', 'ALTER TABLE snapshots ADD COLUMN generation INTEGER NOT NULL DEFAULT 1'),
+)
+
+
+class SnapshotArchive:
+    """Guarda los partidos comprimidos (JSON + zlib) para recargarlos al arrancar"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            # WAL: varios workers pueden leer mientras otro escribe
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(SCHEMA)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(snapshots)')}
+            for column, statement in MIGRATIONS:
+                if column not in columns:
+                    conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def save(self, team, season, snapshot):
+        """Guardar (o sustituir) el snapshot de (equipo, temporada)"""
+        # to_record(): el digest y el saque inicial permiten reconocer los partidos sin cambios al arrancar
+        payload = json.dumps([match.to_record() for match in snapshot.matches], ensure_ascii=False)
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO snapshots (team, season, refreshed_at, payload, generation) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (team, season, snapshot.refreshed_at.isoformat(), zlib.compress(payload.encode('utf-8')),
+                         snapshot.generation)
+                    )
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ No se pudo guardar el snapshot {team}/{season}: {e}")
+
+    def load_all(self):
+        """[(equipo, temporada, refreshed_at, generación, partidos)] guardados; vacío si no hay base de datos"""
+        if not os.path.exists(self.path):
+            return []
+
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    'SELECT team, season, refreshed_at, generation, payload FROM snapshots'
+                ).fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ No se pudieron cargar snapshots guardados: {e}")
+            return []
+
+        snapshots = []
+        for team, season, refreshed_at, generation, payload in rows:
+            try:
+                matches = json.loads(zlib.decompress(payload))
+            except (zlib.error, ValueError) as e:
+                logging.warning(f"⚠️ Snapshot {team}/{season} ilegible: {e}")
+                continue
+            snapshots.append((team, season, datetime.fromisoformat(refreshed_at), generation, matches))
+        return snapshots
@@ -0,0 +1,127 @@
+# archivo: refresh_policy.py - Cadencia adaptativa del refresco y presupuestos por fuente
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import settings
+
+# Ventana durante la que un partido ya empezado se trata como en juego aunque la fuente no lo diga
+MATCH_WINDOW = timedelta(minutes=150)
+
+# Antelación con la que se despierta antes de un saque inicial
+KICKOFF_LEAD = timedelta(hours=1)
+
+
+class RefreshSkipped(Exception):
+    """El refresco no se hizo (p. ej. presupuesto agotado); no significa que los datos estén obsoletos"""
+
+
+def kickoff_of(match, timezone):
+    """Hora de inicio del partido en la zona horaria de la API (None si no se puede leer)"""
+    epoch = getattr(match, 'kickoff', None)
+    if epoch is not None:
+        return datetime.fromtimestamp(epoch, timezone)
+    try:
+        return timezone.localize(datetime.strptime(f"{match['date']} {match['time']}", '%Y-%m-%d %H:%M'))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def in_live_window(match, now):
+    """¿El partido está en juego (LIVE, o programado y con el saque inicial hace menos de MATCH_WINDOW)?"""
+    status = str(match.get('status', '')).upper()
+    if status == 'LIVE':
+        return True
+    if status != 'SCHEDULED':
+        return False
+    kickoff = kickoff_of(match, now.tzinfo)
+    return kickoff is not None and kickoff <= now < kickoff + MATCH_WINDOW
+
+
+def next_refresh_delay(matches, now, interval_minutes=None):
+    """Segundos hasta el siguiente refresco según el estado de los partidos del snapshot
+
+    - LIVE (o dentro de la ventana de un partido ya empezado): cada minuto
+    - saque inicial en menos de una hora: cada pocos minutos
+    - próximo partido en menos de un día: el intervalo configurado
+    - más lejos: se duerme hasta una hora antes del saque, con un máximo de REFRESH_IDLE_SECONDS
+    """
+    interval = (interval_minutes or settings.REFRESH_INTERVAL_MINUTES) * 60
+    timezone = now.tzinfo
+    next_kickoff = None
+
+    for match in matches:
+        if in_live_window(match, now):
+            return settings.REFRESH_LIVE_SECONDS
+        if str(match.get('status', '')).upper() != 'SCHEDULED':
+            continue
+
+        kickoff = kickoff_of(match, timezone)
+        if kickoff is not None and kickoff > now and (next_kickoff is None or kickoff < next_kickoff):
+            next_kickoff = kickoff
+
+    if next_kickoff is None:
+        return settings.REFRESH_IDLE_SECONDS
+
+    until = next_kickoff - now
+    if until <= KICKOFF_LEAD:
+        return min(settings.REFRESH_KICKOFF_SECONDS, max(settings.REFRESH_LIVE_SECONDS, int(until.total_seconds())))
+    if until <= timedelta(days=1):
+        return max(settings.REFRESH_LIVE_SECONDS, min(interval, int((until - KICKOFF_LEAD).total_seconds())))
+
+    return max(interval, min(settings.REFRESH_IDLE_SECONDS, int((until - KICKOFF_LEAD).total_seconds())))
+
+
+def parse_budgets(spec):
+    """'fuente:llamadas/segundos,...' -> {fuente: (llamadas, segundos)}"""
+    budgets = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, quota = item.split(':', 1)
+            calls, period = quota.split('/', 1)
+            budgets[name.strip()] = (int(calls), float(period))
+        except ValueError:
+            logging.warning(f"⚠️ Presupuesto de fuente no válido: {item}")
+    return budgets
+
+
+class RateBudget:
+    """Ventana deslizante de llamadas permitidas a una fuente, compartida entre equipos y temporadas"""
+
+    def __init__(self, calls, period):
+        self.calls = calls
+        self.period = period
+        self._used = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Consumir una llamada si queda presupuesto en la ventana actual"""
+        now = time.monotonic()
+        with self._lock:
+            while self._used and now - self._used[0] >= self.period:
+                self._used.popleft()
+            if len(self._used) >= self.calls:
+                return False
+            self._used.append(now)
+            return True
+
+    def remaining(self):
+        now = time.monotonic()
+        with self._lock:
+            return self.calls - sum(1 for used in self._used if now - used < self.period)
+
+
+_budgets = {name: RateBudget(calls, period) for name, (calls, period) in parse_budgets(settings.SOURCE_RATE_BUDGETS).items()}
+
+
+def acquire_source(name):
+    """¿Se puede consultar la fuente ahora? Las fuentes sin presupuesto configurado no se limitan"""
+    budget = _budgets.get(name)
+    return budget is None or budget.try_acquire()
+
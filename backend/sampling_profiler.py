@@ -0,0 +1,125 @@
+# archivo: sampling_profiler.py - Profiler por muestreo activable con PROFILER_ENABLED
+#
+# Un hilo del sistema toma cada PROFILER_INTERVAL_MS la pila de todos los demás hilos y acumula
+# pilas colapsadas ("a;b;c N"), el formato que leen flamegraph.pl y speedscope.
+#
+# Con gunicorn -k gevent threading y time.sleep están parcheados: un threading.Thread sería un
+# greenlet más del worker y solo se ejecutaría cuando los demás cedieran el control. Por eso el
+# muestreo corre en un hilo nativo (las funciones originales de gevent.monkey): ve el frame que
+# ocupa la CPU en cada hilo del sistema, que con gevent es el greenlet en ejecución (o el hub
+# esperando E/S). Los greenlets bloqueados no consumen CPU y no aparecen. Como las métricas, el
+# perfil es del worker que atiende la petición, no de todo el servicio.
+
+import _thread
+import importlib
+import logging
+import sys
+import time
+from collections import Counter
+
+import settings
+
+# Pilas distintas que se acumulan como mucho; las nuevas a partir de ahí cuentan en OTHER_STACKS
+MAX_STACKS = 5000
+OTHER_STACKS = '(otras pilas)'
+
+
+def _original(module, name):
+    """Función sin parchear por gevent. gevent no se importa aquí: si el worker lo usa ya está
+    cargado, y si no está cargado nada puede estar parcheado"""
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is None:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+def native_thread_api():
+    """(start_new_thread, get_ident, sleep) del sistema aunque gevent haya parcheado los módulos"""
+    return (
+        _original('_thread', 'start_new_thread'),
+        _original('_thread', 'get_ident'),
+        _original('time', 'sleep')
+    )
+
+
+class SamplingProfiler:
+    """Muestreo periódico de pilas con un coste acotado por el intervalo"""
+
+    def __init__(self, interval_ms=None, max_depth=64, max_stacks=MAX_STACKS):
+        self.interval = (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        # Lock sin parchear: con gevent uno parcheado no protege entre hilos nativos
+        self._lock = _original('_thread', 'allocate_lock')()
+        # Cada start() crea un hilo con un número de ejecución; solo muestrea el de la actual, así
+        # que un stop() seguido de start() no deja dos hilos muestreando
+        self._run_id = 0
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._run_id += 1
+            run_id = self._run_id
+        self.started_at = time.time()
+        start_new_thread, _, _ = native_thread_api()
+        start_new_thread(self._run, (run_id,))
+        logging.info(f"🔬 Profiler por muestreo activo (cada {self.interval * 1000:.0f} ms)")
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+
+    def _run(self, run_id):
+        _, get_ident, sleep = native_thread_api()
+        own_id = get_ident()
+        while True:
+            sleep(self.interval)
+            if not self._running or self._run_id != run_id:
+                return
+            frames = sys._current_frames()
+            collapsed = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                # Por función y fichero, sin número de línea: acota las pilas distintas
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]})")
+                    frame = frame.f_back
+                collapsed.append(';'.join(reversed(stack)))
+            with self._lock:
+                if self._run_id != run_id:
+                    return
+                for stack in collapsed:
+                    if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                        stack = OTHER_STACKS
+                    self.stacks[stack] += 1
+                self.samples += 1
+
+    def collapsed(self, reset=False):
+        """Pilas colapsadas ordenadas por número de muestras"""
+        with self._lock:
+            stacks = self.stacks.most_common()
+            if reset:
+                self.stacks.clear()
+                self.samples = 0
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+_profiler = None
+
+
+def get_profiler():
+    """Profiler del proceso si PROFILER_ENABLED está activo (None en otro caso)"""
+    global _profiler
+    if _profiler is None and settings.PROFILER_ENABLED:
+        _profiler = SamplingProfiler()
+        _profiler.start()
+    return _profiler
@@ -0,0 +1,289 @@
+# archivo: season_synthesis.py - Temporadas sintéticas completas para pruebas de carga y benchmarks
+#
+# Una misma semilla genera siempre la misma temporada con el mismo generador de sorteos, pero numpy
+# (el de requirements.txt) y random producen secuencias distintas: dos entornos solo coinciden si
+# ambos usan el mismo (SeasonSynthesizer.backend).
+
+import hashlib
+import itertools
+import logging
+import math
+import random
+from datetime import date, datetime, timedelta
+
+import pytz
+
+try:
+    import numpy
+except ImportError:  # sorteos uno a uno con random como alternativa
+    numpy = None
+
+# Equipos por liga (doble vuelta: n * (n - 1) partidos por liga y temporada)
+LEAGUE_SIZE = 20
+
+KICKOFF_HOURS = ('09:00', '10:00', '11:00', '12:00', '16:00', '17:00', '18:00')
+GOAL_TYPES = ('normal', 'penalty', 'free_kick')
+GOAL_WEIGHTS = (0.85, 0.10, 0.05)
+YELLOW_WEIGHTS = (0.30, 0.40, 0.20, 0.10)
+RED_WEIGHTS = (0.90, 0.10)
+YELLOW_REASONS = ('foul', 'dissent', 'time_wasting')
+RED_REASONS = ('serious_foul', 'violent_conduct')
+STAT_FIELDS = (
+    ('possession_home', 45, 65), ('possession_away', 35, 55),
+    ('shots_home', 8, 18), ('shots_away', 6, 15),
+    ('corners_home', 3, 10), ('corners_away', 2, 8),
+    ('fouls_home', 8, 15), ('fouls_away', 7, 14)
+)
+
+FIRST_NAMES = ('Álvaro', 'Sergio', 'Antonio', 'Carlos', 'Theo', 'Nico', 'Gonzalo', 'Luis', 'David', 'Marco',
+               'Pablo', 'Jorge', 'Iker', 'Raúl', 'Hugo', 'Mario')
+LAST_NAMES = ('Rodríguez', 'Arribas', 'Blanco', 'Dotor', 'García', 'López', 'Jiménez', 'Martín', 'Sánchez',
+              'Pérez', 'González', 'Fernández', 'Latasa', 'Paz', 'Ruiz', 'Moreno')
+SQUAD = tuple(f"{first} {last}" for first, last in itertools.product(FIRST_NAMES, LAST_NAMES))
+REFEREES = tuple(f"{first} {last} {second}" for first, last, second in
+                 itertools.islice(itertools.product(FIRST_NAMES, LAST_NAMES, reversed(LAST_NAMES)), 64))
+
+
+class PythonDraws:
+    """Sorteos por lotes con random.Random (sin dependencias)"""
+
+    backend = 'random'
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def integers(self, low, high, n):
+        """n enteros en [low, high]"""
+        return [self.rng.randint(low, high) for _ in range(n)]
+
+    def poisson(self, lam, n):
+        limit = math.exp(-lam)
+        values = []
+        for _ in range(n):
+            k, p = 0, self.rng.random()
+            while p > limit:
+                k += 1
+                p *= self.rng.random()
+            values.append(k)
+        return values
+
+    def choice(self, weights, n):
+        """n índices según los pesos"""
+        return self.rng.choices(range(len(weights)), weights=weights, k=n)
+
+    def random(self, n):
+        return [self.rng.random() for _ in range(n)]
+
+
+class NumpyDraws:
+    """Sorteos equivalentes vectorizados con numpy (un array por lote en lugar de un bucle); para la
+    misma semilla la secuencia no coincide con la de PythonDraws"""
+
+    backend = 'numpy'
+
+    def __init__(self, seed):
+        self.rng = numpy.random.default_rng(seed)
+
+    def integers(self, low, high, n):
+        return self.rng.integers(low, high + 1, n).tolist()
+
+    def poisson(self, lam, n):
+        return self.rng.poisson(lam, n).tolist()
+
+    def choice(self, weights, n):
+        return self.rng.choice(len(weights), n, p=weights).tolist()
+
+    def random(self, n):
+        return self.rng.random(n).tolist()
+
+
+def make_draws(seed, vectorized=None):
+    """Generador de sorteos: numpy si está disponible (o se pide), random en otro caso. La temporada
+    generada depende del generador elegido, no solo de la semilla"""
+    if isinstance(seed, str):
+        seed = int.from_bytes(hashlib.blake2b(seed.encode('utf-8'), digest_size=8).digest(), 'big')
+    if vectorized is None:
+        vectorized = numpy is not None
+    if vectorized and numpy is None:
+        logging.warning("⚠️ numpy no disponible, usando sorteos con random")
+        vectorized = False
+    return NumpyDraws(seed) if vectorized else PythonDraws(seed)
+
+
+def team_names(count, first=None, extra=()):
+    """count nombres de equipo: primero el propio, luego rivales reales y después sintéticos"""
+    names = [first] if first else []
+    names.extend(name for name in extra if name not in names)
+    index = 1
+    while len(names) < count:
+        names.append(f"CD Sintético {index}")
+        index += 1
+    return names[:count]
+
+
+def round_robin(size):
+    """Jornadas de una doble vuelta (método del círculo): lista de [(local, visitante), ...]"""
+    teams = list(range(size)) + ([None] if size % 2 else [])
+    half = len(teams) // 2
+    rounds = []
+    for _ in range(len(teams) - 1):
+        pairs = [(teams[i], teams[-1 - i]) for i in range(half)]
+        rounds.append([pair for pair in pairs if None not in pair])
+        teams.insert(1, teams.pop())
+    # Segunda vuelta con los campos invertidos
+    return rounds + [[(away, home) for home, away in pairs] for pairs in rounds]
+
+
+def season_start(season):
+    """Primer sábado de septiembre del año de la temporada"""
+    start = date(int(season), 9, 1)
+    return start + timedelta(days=(5 - start.weekday()) % 7)
+
+
+class SeasonSynthesizer:
+    """Temporadas completas de muchas ligas generadas en streaming (un lote de sorteos por liga y temporada)"""
+
+    def __init__(self, teams=LEAGUE_SIZE, seasons=('2025',), seed=0, first_team=None, opponents=(),
+                 league_size=LEAGUE_SIZE, today=None, vectorized=None, timezone='America/Guatemala'):
+        self.names = team_names(teams, first_team, opponents)
+        self.seasons = [str(season) for season in seasons]
+        self.league_size = max(2, league_size)
+        self.today = today or datetime.now(pytz.timezone(timezone)).date()
+        self.draws = make_draws(seed, vectorized)
+        self.backend = self.draws.backend
+        self.timezone = pytz.timezone(timezone)
+        self.timezone_es = pytz.timezone('Europe/Madrid')
+        self._madrid_times = {}
+
+    @property
+    def leagues(self):
+        """Equipos agrupados en ligas de league_size"""
+        return [self.names[i:i + self.league_size] for i in range(0, len(self.names), self.league_size)]
+
+    def estimated_matches(self):
+        return len(self.seasons) * sum(len(league) * (len(league) - 1) for league in self.leagues)
+
+    def madrid_time(self, day, hour):
+        """Hora de Madrid para una fecha y hora de Guatemala (cacheada por fecha y hora)"""
+        key = (day, hour)
+        value = self._madrid_times.get(key)
+        if value is None:
+            local = self.timezone.localize(datetime.combine(day, datetime.strptime(hour, '%H:%M').time()))
+            value = self._madrid_times[key] = local.astimezone(self.timezone_es).strftime('%H:%M')
+        return value
+
+    def __iter__(self):
+        for season in self.seasons:
+            start = season_start(season)
+            for league_number, league in enumerate(self.leagues, 1):
+                yield from self.league_matches(season, league_number, league, start)
+
+    def league_matches(self, season, league_number, league, start):
+        """Partidos de una liga y temporada: todos los números aleatorios se sortean en un solo lote"""
+        competition = f"Liga sintética {league_number}"
+        fixtures = [
+            (round_number, start + timedelta(days=7 * (round_number - 1)), home, away)
+            for round_number, pairs in enumerate(round_robin(len(league)), 1)
+            for home, away in pairs
+        ]
+        n = len(fixtures)
+        draws = self.draws
+        played = [day < self.today for _, day, _, _ in fixtures]
+
+        hours = draws.integers(0, len(KICKOFF_HOURS) - 1, n)
+        day_offsets = draws.integers(0, 1, n)
+        referees = draws.integers(0, len(REFEREES) - 1, n)
+        attendance = draws.integers(800, 2500, n)
+        stats = [draws.integers(low, high, n) for _, low, high in STAT_FIELDS]
+        # Solo los partidos ya jugados tienen goles y tarjetas
+        home_goals = [goals if done else 0 for goals, done in zip(draws.poisson(1.45, n), played)]
+        away_goals = [goals if done else 0 for goals, done in zip(draws.poisson(1.15, n), played)]
+        yellows = [count if done else 0 for count, done in zip(draws.choice(YELLOW_WEIGHTS, n), played)]
+        reds = [count if done else 0 for count, done in zip(draws.choice(RED_WEIGHTS, n), played)]
+
+        goals = sum(home_goals) + sum(away_goals)
+        goal_minutes = draws.integers(1, 90, goals)
+        scorers = draws.integers(0, len(SQUAD) - 1, goals)
+        goal_types = draws.choice(GOAL_WEIGHTS, goals)
+        assisted = draws.random(goals)
+        assists = draws.integers(0, len(SQUAD) - 1, goals)
+
+        cards = sum(yellows) + sum(reds)
+        card_minutes = draws.integers(1, 90, cards)
+        card_players = draws.integers(0, len(SQUAD) - 1, cards)
+        card_sides = draws.integers(0, 1, cards)
+        card_reasons = draws.integers(0, 5, cards)
+        goal_cursor = card_cursor = 0
+
+        for i, (round_number, day, home, away) in enumerate(fixtures):
+            match_day = day + timedelta(days=day_offsets[i])
+            hour = KICKOFF_HOURS[hours[i]]
+            home_team, away_team = league[home], league[away]
+            match = {
+                'id': f"synthetic-{season}-{league_number}-{round_number}-{home}-{away}",
+                'date': match_day.isoformat(),
+                'time': hour,
+                'madrid_time': self.madrid_time(match_day, hour),
+                'home_team': home_team,
+                'away_team': away_team,
+                'competition': competition,
+                'venue': f"Estadio {home_team}",
+                'status': 'scheduled',
+                'result': None,
+                'home_score': None,
+                'away_score': None,
+                'referee': REFEREES[referees[i]],
+                'source': 'synthetic',
+
+                'goalscorers': [],
+                'cards': [],
+                'substitutions': [],
+                'tv_broadcast': [],
+                'statistics': {},
+                'attendance': 0,
+                'weather': {}
+            }
+
+            if played[i]:
+                home_score, away_score = home_goals[i], away_goals[i]
+                goalscorers = []
+                for side, count in (('home', home_score), ('away', away_score)):
+                    for j in range(goal_cursor, goal_cursor + count):
+                        goalscorers.append({
+                            'player_name': SQUAD[scorers[j]],
+                            'minute': goal_minutes[j],
+                            'team': side,
+                            'goal_type': GOAL_TYPES[goal_types[j]],
+                            'assist_player': SQUAD[assists[j]] if assisted[j] < 0.6 else None
+                        })
+                    goal_cursor += count
+
+                match_cards = []
+                for card_type, count, reasons in (('yellow', yellows[i], YELLOW_REASONS), ('red', reds[i], RED_REASONS)):
+                    for j in range(card_cursor, card_cursor + count):
+                        match_cards.append({
+                            'player_name': SQUAD[card_players[j]],
+                            'minute': card_minutes[j],
+                            'team': 'home' if card_sides[j] == 0 else 'away',
+                            'card_type': card_type,
+                            'reason': reasons[card_reasons[j] % len(reasons)]
+                        })
+                    card_cursor += count
+
+                match.update({
+                    'status': 'finished',
+                    'result': f"{home_score}-{away_score}",
+                    'home_score': home_score,
+                    'away_score': away_score,
+                    'goalscorers': sorted(goalscorers, key=lambda event: event['minute']),
+                    'cards': sorted(match_cards, key=lambda event: event['minute']),
+                    'statistics': {name: values[i] for (name, _, _), values in zip(STAT_FIELDS, stats)},
+                    'attendance': attendance[i]
+                })
+
+            yield match
+
+
+def synthesize_matches(teams=LEAGUE_SIZE, seasons=('2025',), seed=0, **options):
+    """Generador de partidos sintéticos (ver SeasonSynthesizer); no materializa la lista completa"""
+    return iter(SeasonSynthesizer(teams=teams, seasons=seasons, seed=seed, **options))
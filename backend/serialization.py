@@ -0,0 +1,56 @@
+# archivo: serialization.py - Serialización JSON rápida y variantes comprimidas
+
+import gzip
+import hashlib
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:  # json estándar como alternativa
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # sin brotli solo se ofrece gzip
+    brotli = None
+
+# Por debajo de este tamaño no compensa comprimir
+MIN_COMPRESS_BYTES = 512
+
+if orjson is None:
+    logging.info("ℹ️ orjson no disponible, usando json estándar")
+
+
+def dumps(data):
+    """Serializar a bytes UTF-8 con el codificador más rápido disponible"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Deserializar JSON desde bytes (o una vista de memoria)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def compress_variants(body):
+    """{'gzip': bytes, 'br': bytes} para el cuerpo; vacío si es demasiado pequeño"""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return {}
+
+    variants = {'gzip': gzip.compress(body, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=9)
+    return variants
+
+
+def digest(data):
+    """Hash de contenido estable (claves ordenadas) de un dict JSON-serializable"""
+    if orjson is not None:
+        raw = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    else:
+        raw = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
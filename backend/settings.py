@@ -0,0 +1,132 @@
+# archivo: settings.py - Configuración compartida del backend
+
+import json
+import os
+
+# Zona horaria de referencia para la API
+TIMEZONE = 'America/Guatemala'
+
+# Cada cuántos minutos se refresca el snapshot de partidos
+REFRESH_INTERVAL_MINUTES = int(os.environ.get('REFRESH_INTERVAL_MINUTES', '30'))
+
+# Permite desactivar el scheduler (por ejemplo en scripts o consolas)
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() != 'false'
+
+# Directorio persistente (disco "castilla-data" en Render)
+DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+# Coordinar el scraping entre workers de gunicorn mediante lock files en DATA_DIR
+SINGLEFLIGHT_LOCK_FILES = os.environ.get('SINGLEFLIGHT_LOCK_FILES', 'true').lower() != 'false'
+
+# Cliente HTTP compartido por los scrapers
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '8'))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', '2'))
+HTTP_BACKOFF_SECONDS = float(os.environ.get('HTTP_BACKOFF_SECONDS', '0.5'))
+HTTP_PER_HOST_LIMIT = int(os.environ.get('HTTP_PER_HOST_LIMIT', '2'))
+# Tiempo máximo por URL sumando intentos, esperas de backoff y cola del límite por host
+HTTP_TOTAL_TIMEOUT = float(os.environ.get('HTTP_TOTAL_TIMEOUT', '15'))
+
+# Fuentes de partidos consultadas en paralelo (por orden de prioridad)
+SOURCES = [s.strip() for s in os.environ.get('SOURCES', 'api_football,fotmob,sofascore,transfermarkt').split(',') if s.strip()]
+
+# Tiempo máximo que se espera a las fuentes en cada refresco
+SOURCE_DEADLINE_SECONDS = float(os.environ.get('SOURCE_DEADLINE_SECONDS', '12'))
+
+# URLs base de las fuentes (sobrescribibles para pruebas con servidores locales)
+API_FOOTBALL_BASE_URL = os.environ.get('API_FOOTBALL_BASE_URL', 'https://v3.football.api-sports.io')
+FOTMOB_BASE_URL = os.environ.get('FOTMOB_BASE_URL', 'https://www.fotmob.com/api')
+SOFASCORE_BASE_URL = os.environ.get('SOFASCORE_BASE_URL', 'https://api.sofascore.com/api/v1')
+TRANSFERMARKT_BASE_URL = os.environ.get('TRANSFERMARKT_BASE_URL', 'https://www.transfermarkt.es')
+
+# Caché HTTP en disco (ETag/Last-Modified) para las páginas de origen
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', os.path.join(DATA_DIR, 'http-cache'))
+
+# Motor del parser de Transfermarkt: 'lxml' (un solo recorrido) o 'bs4' (html.parser)
+PARSER_ENGINE = os.environ.get('PARSER_ENGINE', 'lxml').lower()
+
+# Cabeceras de caché de /api/matches (navegador, CDN)
+CACHE_MAX_AGE = int(os.environ.get('CACHE_MAX_AGE', '60'))
+CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get('CACHE_STALE_WHILE_REVALIDATE', '600'))
+
+# Consultas filtradas de /api/matches
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '50'))
+MAX_CACHED_QUERIES = int(os.environ.get('MAX_CACHED_QUERIES', '128'))
+
+# Zonas horarias (?tz=) cuyas horas locales y calendarios se cachean a la vez por snapshot
+MAX_CACHED_TIMEZONES = int(os.environ.get('MAX_CACHED_TIMEZONES', '16'))
+
+# Equipos servidos por esta instancia (ids por fuente); EXTRA_TEAMS admite más en JSON
+TEAMS = {
+    'castilla': {
+        'name': 'Real Madrid Castilla',
+        'keyword': 'castilla',
+        'aliases': ['real madrid ii', 'real madrid b'],
+        'stadium': 'Estadio Alfredo Di Stéfano',
+        'api_football': 530,
+        'fotmob': 8367,
+        'sofascore': 17061,
+        'transfermarkt': '6767'
+    }
+}
+TEAMS.update(json.loads(os.environ.get('EXTRA_TEAMS', '{}')))
+
+DEFAULT_TEAM = os.environ.get('DEFAULT_TEAM', 'castilla')
+DEFAULT_SEASON = os.environ.get('DEFAULT_SEASON', '2025')
+
+# Temporadas que se refrescan de forma programada: las únicas que acepta la API, así que también
+# acotan los partidos en memoria
+SEASONS = [s.strip() for s in os.environ.get('SEASONS', DEFAULT_SEASON).split(',') if s.strip()]
+if DEFAULT_SEASON not in SEASONS:
+    SEASONS.append(DEFAULT_SEASON)
+
+# Snapshots persistidos en disco para arrancar sin scraping en frío
+PERSIST_SNAPSHOTS = os.environ.get('PERSIST_SNAPSHOTS', 'true').lower() != 'false'
+SNAPSHOT_DB_PATH = os.environ.get('SNAPSHOT_DB_PATH', os.path.join(DATA_DIR, 'snapshots.sqlite3'))
+
+# Snapshot compartido entre workers de gunicorn: un worker refresca y el resto mapea sus respuestas
+SHARED_SNAPSHOTS = os.environ.get('SHARED_SNAPSHOTS', 'false').lower() == 'true'
+SHARED_SNAPSHOT_DIR = os.environ.get('SHARED_SNAPSHOT_DIR', os.path.join(DATA_DIR, 'shared'))
+
+# Entradas del changelog de refrescos que se conservan por (equipo, temporada)
+CHANGELOG_SIZE = int(os.environ.get('CHANGELOG_SIZE', '50'))
+
+# Cadencia adaptativa del refresco según el calendario (segundos)
+REFRESH_LIVE_SECONDS = int(os.environ.get('REFRESH_LIVE_SECONDS', '60'))
+REFRESH_KICKOFF_SECONDS = int(os.environ.get('REFRESH_KICKOFF_SECONDS', '300'))
+REFRESH_IDLE_SECONDS = int(os.environ.get('REFRESH_IDLE_SECONDS', str(6 * 3600)))
+REFRESH_RETRY_SECONDS = int(os.environ.get('REFRESH_RETRY_SECONDS', '300'))
+
+# Segundos durante los que un resultado de otro worker se reutiliza: como mucho la mitad del refresco
+# más frecuente, para que un refresco nunca reciba como nuevo el resultado de la vuelta anterior
+SINGLEFLIGHT_SHARE_SECONDS = min(
+    int(os.environ.get('SINGLEFLIGHT_SHARE_SECONDS', str(REFRESH_LIVE_SECONDS // 4))),
+    REFRESH_LIVE_SECONDS // 2
+)
+
+# Presupuesto de peticiones por fuente: "fuente:llamadas/segundos" separados por comas
+SOURCE_RATE_BUDGETS = os.environ.get(
+    'SOURCE_RATE_BUDGETS',
+    'api_football:100/86400,fotmob:120/3600,sofascore:60/3600,transfermarkt:20/3600'
+)
+
+# Deltas en vivo por SSE (/api/live)
+LIVE_BUFFER_SIZE = int(os.environ.get('LIVE_BUFFER_SIZE', '500'))
+LIVE_HEARTBEAT_SECONDS = float(os.environ.get('LIVE_HEARTBEAT_SECONDS', '15'))
+LIVE_RETRY_MS = int(os.environ.get('LIVE_RETRY_MS', '5000'))
+
+# Periodo (en días) durante el que el calendario de fallback generado es idéntico
+FALLBACK_BUCKET_DAYS = max(1, int(os.environ.get('FALLBACK_BUCKET_DAYS', '1')))
+
+# Pruebas de carga: si es > 0, el fallback sintetiza una temporada completa con tantos equipos
+FALLBACK_BULK_TEAMS = int(os.environ.get('FALLBACK_BULK_TEAMS', '0'))
+
+# Profiler por muestreo (/debug/profile); PROFILER_TOKEN protege el endpoint si se define
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true'
+PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', '10'))
+PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN', '')
+
+# /api/health: antigüedad máxima de la última comprobación y margen de arranque sin snapshot
+HEALTH_MAX_AGE_SECONDS = int(os.environ.get('HEALTH_MAX_AGE_SECONDS', str(2 * REFRESH_IDLE_SECONDS)))
+HEALTH_STARTUP_GRACE_SECONDS = int(os.environ.get('HEALTH_STARTUP_GRACE_SECONDS', '300'))
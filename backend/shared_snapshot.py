@@ -0,0 +1,310 @@
+# archivo: shared_snapshot.py - Snapshot compartido entre workers de gunicorn mediante mmap
+#
+# Por cada (equipo, temporada) hay un worker líder (lock con flock) que refresca y escribe un
+# fichero inmutable por versión con las respuestas ya serializadas (JSON, ICS y clasificación, con
+# sus variantes comprimidas) y cada partido (Match.to_record) con un índice id -> posición. Un fichero de
+# control de pocos bytes, mapeado en memoria, publica la versión vigente: los demás workers la leen
+# en cada petición y cambian de fichero cuando sube.
+#
+# Los seguidores no reconstruyen los Match al adoptar una versión: /api/match decodifica solo el
+# partido pedido a partir del índice. Los índices de consulta (MatchIndex) no se escriben en el
+# fichero; se construyen en el worker la primera vez que recibe una consulta filtrada.
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+import serialization
+from snapshot import Artifact, Snapshot, restore_matches
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos, cada worker es líder
+    fcntl = None
+
+MAGIC = b'CSNP'
+FORMAT_VERSION = 3
+FILE_HEADER = struct.Struct('<4sIQ')        # magia, formato, longitud de la cabecera JSON
+CONTROL = struct.Struct('<dBxxxxxxxQ')      # última comprobación, obsoleto, versión (escrita al final)
+
+# Versiones anteriores que se conservan en disco para peticiones que aún las estén enviando
+KEEP_VERSIONS = 3
+
+# Trozos en los que se copia el cuerpo cuando el servidor no ofrece wsgi.file_wrapper (sendfile)
+CHUNK_SIZE = 256 * 1024
+
+
+class SharedState:
+    """Contenido del fichero de control"""
+
+    __slots__ = ('version', 'last_checked', 'stale')
+
+    def __init__(self, version, last_checked, stale):
+        self.version = version
+        self.last_checked = last_checked
+        self.stale = stale
+
+
+class MappedArtifact(Artifact):
+    """Artifact cuyo cuerpo y variantes son vistas del fichero mapeado (sin copias por worker)"""
+
+    __slots__ = ('path', 'sections')
+
+    def __init__(self, view, path, sections, etag, last_modified=None):
+        self.path = path
+        self.sections = sections  # codificación ('' = identidad) -> (offset, longitud)
+        self.etag = etag
+        self.last_modified = datetime.fromisoformat(last_modified) if last_modified else None
+        offset, length = sections['']
+        self.body = view[offset:offset + length]
+        self.encoded = {
+            encoding: view[offset:offset + length]
+            for encoding, (offset, length) in sections.items() if encoding
+        }
+
+    def wsgi_body(self, encoding, environ):
+        """Iterable WSGI del cuerpo: sendfile con wsgi.file_wrapper (gunicorn) o trozos del mmap"""
+        offset, length = self.sections[encoding or '']
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            try:
+                handle = open(self.path, 'rb')
+            except OSError:
+                pass  # versión ya eliminada: se sirve desde el mapeo
+            else:
+                handle.seek(offset)
+                return file_wrapper(handle, CHUNK_SIZE)
+        view = self.encoded[encoding] if encoding else self.body
+        return (bytes(view[i:i + CHUNK_SIZE]) for i in range(0, length, CHUNK_SIZE))
+
+
+class MappedSnapshot(Snapshot):
+    """Snapshot leído del fichero compartido; los partidos se decodifican solo si se necesitan"""
+
+    mapped = True
+
+    __slots__ = ('_view', '_matches', '_by_id', '_match_index')
+
+    def __init__(self, view, header, path):
+        self._view = view
+        self._matches = None
+        self._by_id = None
+        self._match_index = header['match_index']  # id -> (offset, longitud) de su JSON
+        self.generation = header['generation']
+        self.summary = header['summary']
+        self.refreshed_at = datetime.fromisoformat(header['refreshed_at'])
+        self.stale = header['stale']
+        self.error = header['error']
+        self._index = None
+        self._local_times = {}
+        self.variants = {}
+        self.artifacts = {
+            name: MappedArtifact(view, path, artifact['sections'], artifact['etag'], artifact.get('last_modified'))
+            for name, artifact in header['artifacts'].items()
+        }
+
+    def find(self, match_id):
+        """Partido por id decodificando solo su JSON (o del diccionario si ya se decodificaron todos)"""
+        if self._by_id is not None:
+            return self._by_id.get(match_id)
+        position = self._match_index.get(match_id)
+        if position is None:
+            return None
+        return self._restore([position])[0]
+
+    def _restore(self, positions):
+        view = self._view
+        return restore_matches(serialization.loads(view[offset:offset + length]) for offset, length in positions)
+
+    @property
+    def matches(self):
+        # Con el digest y el saque inicial de origen: si este worker pasa a ser líder, su primer
+        # refresco no da por modificados los partidos que no cambiaron
+        if self._matches is None:
+            self._matches = self._restore(self._match_index.values())
+        return self._matches
+
+    @property
+    def by_id(self):
+        if self._by_id is None:
+            self._by_id = {match.id: match for match in self.matches}
+        return self._by_id
+
+
+class SharedSnapshotFile:
+    """Ficheros compartidos de un (equipo, temporada): control, versiones y lock de líder"""
+
+    def __init__(self, directory, team, season, build_matches):
+        self.directory = directory
+        self.name = f"{team}-{season}"
+        self.build_matches = build_matches
+        self.leading = fcntl is None
+        self._lock_handle = None
+        self._control = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, version):
+        return os.path.join(self.directory, f"{self.name}.{version}.snap")
+
+    def try_lead(self):
+        """Intentar ser el worker que refresca esta clave (se mantiene mientras viva el proceso)"""
+        if self.leading:
+            return True
+        with self._lock:
+            if self._lock_handle is None:
+                self._lock_handle = open(os.path.join(self.directory, f"{self.name}.lock"), 'a+')
+            try:
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+            self.leading = True
+        logging.info(f"👑 Este worker refresca {self.name} (pid {os.getpid()})")
+        return True
+
+    def _control_map(self):
+        """Fichero de control mapeado (se crea vacío si no existe)"""
+        if self._control is None:
+            with self._lock:
+                if self._control is None:
+                    path = os.path.join(self.directory, f"{self.name}.ctl")
+                    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < CONTROL.size:
+                            os.ftruncate(fd, CONTROL.size)
+                        self._control = mmap.mmap(fd, CONTROL.size)
+                    finally:
+                        os.close(fd)
+        return self._control
+
+    def state(self):
+        """Versión publicada, última comprobación y si los datos están obsoletos"""
+        last_checked, stale, version = CONTROL.unpack_from(self._control_map(), 0)
+        return SharedState(version, last_checked, bool(stale))
+
+    def touch(self, last_checked, stale):
+        """Actualizar la última comprobación sin publicar una versión nueva"""
+        control = self._control_map()
+        version = CONTROL.unpack_from(control, 0)[2]
+        CONTROL.pack_into(control, 0, last_checked.timestamp() if last_checked else 0, stale, version)
+
+    def write(self, snapshot, artifacts, changelog, last_checked):
+        """Escribir una versión nueva (fichero temporal + rename) y publicarla en el control"""
+        version = self.state().version + 1
+        sections = []
+        header_artifacts = {}
+        offset = 0
+        for name, artifact in artifacts.items():
+            parts = {'': artifact.body, **artifact.encoded}
+            header_artifacts[name] = {'etag': artifact.etag, 'sections': {}}
+            if artifact.last_modified is not None:
+                header_artifacts[name]['last_modified'] = artifact.last_modified.isoformat()
+            for encoding, body in parts.items():
+                header_artifacts[name]['sections'][encoding] = [offset, len(body)]
+                sections.append(body)
+                offset += len(body)
+
+        # Cada partido por separado (con digest y saque inicial) para leerlos de uno en uno
+        match_index = {}
+        for match in snapshot.matches:
+            body = serialization.dumps(match.to_record())
+            match_index[match.id] = [offset, len(body)]
+            sections.append(body)
+            offset += len(body)
+
+        header = serialization.dumps({
+            'generation': snapshot.generation,
+            'refreshed_at': snapshot.refreshed_at.isoformat(),
+            'stale': snapshot.stale,
+            'error': snapshot.error,
+            'summary': snapshot.summary,
+            'changelog': list(changelog),
+            'artifacts': header_artifacts,
+            'match_index': match_index
+        })
+        # Los offsets de la cabecera son relativos al final de la cabecera
+        base = FILE_HEADER.size + len(header)
+
+        path = self.path(version)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+            fh.write(header)
+            for body in sections:
+                fh.write(body)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+
+        CONTROL.pack_into(
+            self._control_map(), 0, last_checked.timestamp() if last_checked else 0, snapshot.stale, version
+        )
+        self._cleanup(version)
+        logging.info(f"🗂️ Snapshot compartido {self.name} v{version} ({base + offset} bytes)")
+        return version
+
+    def _cleanup(self, version):
+        for old in range(max(1, version - 2 * KEEP_VERSIONS), version - KEEP_VERSIONS + 1):
+            try:
+                os.unlink(self.path(old))
+            except FileNotFoundError:
+                pass
+
+    def load(self, version):
+        """(MappedSnapshot, changelog) de una versión; None si el fichero ya no existe o no es válido"""
+        path = self.path(version)
+        try:
+            with open(path, 'rb') as fh:
+                mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ No se pudo mapear {path}: {e}")
+            return None
+
+        magic, file_format, header_length = FILE_HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC or file_format != FORMAT_VERSION:
+            logging.warning(f"⚠️ Fichero compartido con formato desconocido: {path}")
+            return None
+
+        base = FILE_HEADER.size + header_length
+        header = serialization.loads(mapping[FILE_HEADER.size:base])
+        for artifact in header['artifacts'].values():
+            artifact['sections'] = {
+                encoding: (base + offset, length) for encoding, (offset, length) in artifact['sections'].items()
+            }
+        header['match_index'] = {
+            match_id: (base + offset, length) for match_id, (offset, length) in header['match_index'].items()
+        }
+        return MappedSnapshot(memoryview(mapping), header, path), header['changelog']
+
+    def load_newer(self, known_version, wait=0):
+        """(estado, (versión, MappedSnapshot, changelog) o None si no hay nada más nuevo que known_version)
+
+        Con wait > 0 se espera a que el líder publique la primera versión.
+        """
+        state = self.state()
+        deadline = time.monotonic() + wait
+        while not state.version and time.monotonic() < deadline:
+            time.sleep(0.2)
+            state = self.state()
+
+        if not state.version or state.version == known_version:
+            return state, None
+        loaded = self.load(state.version)
+        if loaded is None:
+            return state, None
+        return state, (state.version, *loaded)
+
+
+class SharedSnapshots:
+    """Directorio de snapshots compartidos; build_matches construye el cuerpo de /api/matches"""
+
+    def __init__(self, directory, build_matches):
+        self.directory = directory
+        self.build_matches = build_matches
+
+    def for_key(self, team, season):
+        return SharedSnapshotFile(self.directory, team, season, self.build_matches)
@@ -0,0 +1,128 @@
+# archivo: singleflight.py - Coalescencia de llamadas concurrentes al scraper
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo coalescencia dentro del proceso
+    fcntl = None
+
+# Espera entre intentos de tomar el lock file (crece hasta el máximo mientras otro worker lo tenga)
+LOCK_POLL_SECONDS = 0.05
+LOCK_POLL_MAX_SECONDS = 0.5
+
+
+class _Call:
+    """Llamada en curso compartida por todos los que esperan la misma clave"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Garantiza una sola ejecución simultánea por clave; el resto recibe el mismo resultado"""
+
+    def __init__(self, lock_dir=None, share_seconds=15):
+        self.lock_dir = lock_dir
+        self.share_seconds = share_seconds
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Ejecutar fn() una sola vez para todas las llamadas concurrentes con la misma clave"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result
+
+    def _run(self, key, fn):
+        """Ejecutar fn() protegido por un lock file compartido entre workers"""
+        if not self.lock_dir or fcntl is None:
+            return fn()
+
+        try:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        except OSError as e:
+            logging.warning(f"⚠️ Sin lock entre workers ({self.lock_dir}): {e}")
+            return fn()
+
+        name = re.sub(r'[^a-zA-Z0-9_.-]+', '-', '-'.join(str(part) for part in key))
+        lock_path = os.path.join(self.lock_dir, f"singleflight-{name}.lock")
+        result_path = os.path.join(self.lock_dir, f"singleflight-{name}.json")
+        started = time.time()
+
+        with open(lock_path, 'a') as lock_file:
+            self._acquire(lock_file)
+            try:
+                shared = self._read_shared(result_path, started)
+                if shared is not None:
+                    logging.info(f"🤝 Reutilizando resultado de otro worker para {key}")
+                    return shared
+
+                result = fn()
+                self._write_shared(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _acquire(lock_file):
+        """flock sin bloquear el hilo: con workers gevent un LOCK_EX bloqueante congelaría el proceso
+        entero, así que se reintenta con LOCK_NB y time.sleep (que cede el control al hub)"""
+        delay = LOCK_POLL_SECONDS
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                time.sleep(delay)
+                delay = min(delay * 2, LOCK_POLL_MAX_SECONDS)
+
+    def _read_shared(self, path, started):
+        """Leer el resultado de otro worker si es lo bastante reciente"""
+        try:
+            if os.path.getmtime(path) < started - self.share_seconds:
+                return None
+            with open(path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write_shared(self, path, result):
+        """Publicar el resultado para los demás workers de forma atómica"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(result, fh, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"⚠️ No se pudo compartir resultado entre workers: {e}")
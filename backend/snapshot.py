@@ -0,0 +1,583 @@
+# archivo: snapshot.py - Snapshot de partidos refrescado en segundo plano
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+import pytz
+
+import settings
+from ics_feed import IcsRenderer
+from metrics import REFRESHES, cache_result, stage
+from match_index import MatchIndex
+from models import Match
+from refresh_policy import RefreshSkipped, next_refresh_delay
+from serialization import compress_variants, digest
+from timezones import clock
+
+
+def build_summary(matches):
+    """Resumen de estados calculado una sola vez por snapshot"""
+    statuses = [str(m.get('status', '')).upper() for m in matches]
+    return {
+        'total': len(matches),
+        'finalizados': statuses.count('FINISHED'),
+        'proximos': statuses.count('SCHEDULED'),
+        'en_vivo': statuses.count('LIVE')
+    }
+
+
+class MatchDiff:
+    """Ids añadidos, modificados y eliminados entre dos snapshots"""
+
+    __slots__ = ('added', 'changed', 'removed')
+
+    def __init__(self, added=(), changed=(), removed=()):
+        self.added = list(added)
+        self.changed = list(changed)
+        self.removed = list(removed)
+
+    @property
+    def empty(self):
+        return not (self.added or self.changed or self.removed)
+
+    def to_dict(self, generation, refreshed_at):
+        return {
+            'generacion': generation,
+            'fecha': refreshed_at.isoformat(),
+            'anadidos': self.added,
+            'modificados': self.changed,
+            'eliminados': self.removed
+        }
+
+
+def diff_matches(previous_by_id, raw_matches):
+    """(partidos, MatchDiff): reutiliza los Match sin cambios y solo convierte los nuevos o modificados"""
+    matches = []
+    added = []
+    changed = []
+    seen = set()
+
+    for data in raw_matches:
+        match_id = str(data['id'])
+        if match_id in seen:
+            continue
+        seen.add(match_id)
+
+        content_hash = digest(data)
+        previous = previous_by_id.get(match_id)
+        if previous is not None and previous.digest == content_hash:
+            matches.append(previous)
+            continue
+
+        match = Match.from_dict(data)
+        match.digest = content_hash
+        matches.append(match)
+        (changed if previous is not None else added).append(match_id)
+
+    removed = [match_id for match_id in previous_by_id if match_id not in seen]
+    return matches, MatchDiff(added, changed, removed)
+
+
+def restore_matches(records):
+    """Partidos guardados con Match.to_record(), con el digest que tenían al guardarse (los
+    registros antiguos sin digest se vuelven a calcular)"""
+    matches = []
+    for record in records:
+        record = dict(record)
+        content_hash = record.pop('digest', None)
+        match = Match.from_dict(record)
+        match.digest = content_hash or digest(record)
+        matches.append(match)
+    return matches
+
+
+class Artifact:
+    """Respuesta ya serializada para un snapshot: cuerpo, ETag de contenido y variantes comprimidas"""
+
+    __slots__ = ('body', 'etag', 'encoded', 'last_modified')
+
+    def __init__(self, body, last_modified=None):
+        self.body = body
+        # Momento que se envía como Last-Modified si no es el del snapshot (p. ej. la clasificación)
+        self.last_modified = last_modified
+        self.etag = hashlib.sha1(body).hexdigest()
+        with stage('compress'):
+            self.encoded = compress_variants(body)
+
+    def variant(self, accept_encodings):
+        """(codificación, cuerpo, etag) preferido según Accept-Encoding"""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and accept_encodings[encoding]:
+                return encoding, self.encoded[encoding], f"{self.etag}-{encoding}"
+        return None, self.body, self.etag
+
+
+class Snapshot:
+    """Copia inmutable de los partidos obtenidos en un refresco"""
+
+    # MappedSnapshot: leído del fichero compartido por un worker seguidor
+    mapped = False
+
+    __slots__ = ('matches', 'by_id', 'generation', 'summary', 'refreshed_at', 'stale', 'error',
+                 'artifacts', 'variants', '_index', '_local_times')
+
+    def __init__(self, matches, refreshed_at, stale=False, error=None, generation=1):
+        self.matches = matches
+        self.by_id = {match.id: match for match in matches}
+        self.generation = generation
+        self.summary = build_summary(matches)
+        self.refreshed_at = refreshed_at
+        self.stale = stale
+        self.error = error
+        # Respuestas serializadas bajo demanda, una vez por snapshot: las canónicas sin límite y las
+        # variantes (consultas filtradas) en LRU acotadas por grupo
+        self.artifacts = {}
+        self.variants = {}
+        self._index = None
+        self._local_times = {}
+
+    def find(self, match_id):
+        """Partido por id (None si no está)"""
+        return self.by_id.get(match_id)
+
+    @property
+    def index(self):
+        """Índices de consulta, construidos la primera vez que se filtra"""
+        if self._index is None:
+            self._index = MatchIndex(self.matches)
+        return self._index
+
+    def local_times(self, tz):
+        """{id: (fecha, hora)} de todos los partidos en la zona tz, calculado una vez por snapshot y zona"""
+        times = self._local_times.get(tz)
+        if times is None:
+            times = clock(tz).convert(self.matches)
+            if len(self._local_times) < settings.MAX_CACHED_TIMEZONES:
+                self._local_times[tz] = times
+        return times
+
+    def as_stale(self, error):
+        """Misma copia de datos marcada como obsoleta tras un refresco fallido"""
+        return Snapshot(self.matches, self.refreshed_at, stale=True, error=error, generation=self.generation)
+
+
+class SnapshotStore:
+    """Guarda el último snapshot y lo refresca con APScheduler"""
+
+    def __init__(self, fetcher, interval_minutes=None, timezone=settings.TIMEZONE, on_publish=None, shared=None,
+                 share_extras=None, calendar_name=None):
+        self.fetcher = fetcher
+        self.on_publish = on_publish
+        # SharedSnapshotFile: un solo worker refresca y el resto mapea sus respuestas serializadas
+        self.shared = shared
+        # Respuestas adicionales que el líder escribe en el fichero compartido: share_extras() -> {nombre: Artifact}
+        self.share_extras = share_extras
+        self._shared_version = 0
+        self.interval_minutes = interval_minutes or settings.REFRESH_INTERVAL_MINUTES
+        self.timezone = pytz.timezone(timezone)
+        self.last_checked = None
+        self.changelog = deque(maxlen=settings.CHANGELOG_SIZE)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._scheduler = None
+        self._job_id = None
+        self.next_refresh_at = None
+        self.calendar_name = calendar_name
+        self.ics_renderer = IcsRenderer(timezone, calendar_name)
+        self._tz_renderers = OrderedDict()
+        self._render_lock = threading.Lock()
+
+    def refresh(self):
+        """Ejecutar el scraper y publicar solo si cambió algún partido; conserva el anterior si falla"""
+        if self.shared is not None and not self.shared.try_lead():
+            # Otro worker refresca esta clave: basta con adoptar lo que haya publicado
+            return self.sync(wait=settings.SOURCE_DEADLINE_SECONDS + 5 if self._snapshot is None else 0)
+
+        try:
+            with stage('fetch'):
+                raw_matches = self.fetcher()
+        except RefreshSkipped as e:
+            logging.info(f"⏳ Refresco omitido: {e}")
+            REFRESHES.inc(outcome='skipped')
+            return False
+        except Exception as e:
+            logging.warning(f"⚠️ Error refrescando snapshot: {e}")
+            REFRESHES.inc(outcome='error')
+            with self._lock:
+                became_stale = self._snapshot is not None and not self._snapshot.stale
+                if became_stale:
+                    self._snapshot = self._snapshot.as_stale(str(e))
+            if became_stale:
+                self.share()
+            return False
+
+        previous = self._snapshot
+        with stage('diff'):
+            matches, diff = diff_matches(previous.by_id if previous else {}, raw_matches)
+
+        now = datetime.now(self.timezone)
+        with self._lock:
+            self.last_checked = now
+            current = self._snapshot
+            if current is not previous:
+                # Otro refresco publicó mientras tanto: el diff debe ser contra lo que hay ahora,
+                # o se aplicarían dos veces los mismos partidos añadidos
+                matches, diff = diff_matches(current.by_id if current else {}, raw_matches)
+            if current is not None and diff.empty:
+                # Sin cambios: se conserva el snapshot (y sus ETags y respuestas serializadas)
+                if not current.stale:
+                    logging.info("📦 Snapshot sin cambios")
+                    REFRESHES.inc(outcome='unchanged')
+                    if self.shared is not None:
+                        self.shared.touch(now, False)
+                    return True
+                snapshot = Snapshot(current.matches, now, generation=current.generation)
+            else:
+                generation = current.generation + 1 if current is not None else 1
+                snapshot = Snapshot(matches, now, generation=generation)
+                self.changelog.append(diff.to_dict(generation, now))
+            self._snapshot = snapshot
+
+        REFRESHES.inc(outcome='updated')
+        if self.on_publish is not None:
+            with stage('publish'):
+                self.on_publish(snapshot, diff, current)
+        self.share()
+
+        logging.info(
+            f"📦 Snapshot actualizado: {len(matches)} partidos "
+            f"(+{len(diff.added)} ~{len(diff.changed)} -{len(diff.removed)})"
+        )
+        return True
+
+    def share(self):
+        """Líder: escribir el snapshot con sus respuestas ya serializadas para el resto de workers"""
+        if self.shared is None:
+            return
+        try:
+            snapshot, matches = self.artifact('matches', self.shared.build_matches)
+            _, calendar = self.calendar()
+            artifacts = {'matches': matches, 'ics': calendar}
+            if self.share_extras is not None:
+                artifacts.update(self.share_extras())
+            self.shared.write(snapshot, artifacts, self.changelog, self.last_checked)
+        except OSError as e:
+            logging.warning(f"⚠️ No se pudo compartir el snapshot: {e}")
+
+    def sync(self, wait=0):
+        """Seguidor: adoptar la última versión publicada por el worker líder (True si cambió)"""
+        state, loaded = self.shared.load_newer(self._shared_version, wait)
+        if state.last_checked:
+            self.last_checked = datetime.fromtimestamp(state.last_checked, self.timezone)
+        if loaded is None:
+            return False
+
+        version, snapshot, changelog = loaded
+        with self._lock:
+            if version == self._shared_version:
+                return False  # otra petición ya la instaló
+            previous = self._snapshot
+            # El diff solo es válido contra una versión compartida anterior, no contra la de disco
+            incremental = self._shared_version != 0 and previous is not None
+            self._snapshot = snapshot
+            self._shared_version = version
+            self.changelog = deque(changelog, maxlen=settings.CHANGELOG_SIZE)
+
+        diff = None
+        if incremental:
+            entries = [entry for entry in changelog if entry['generacion'] > previous.generation]
+            if len(entries) == snapshot.generation - previous.generation:
+                diff = MatchDiff(
+                    [match_id for entry in entries for match_id in entry['anadidos']],
+                    [match_id for entry in entries for match_id in entry['modificados']],
+                    [match_id for entry in entries for match_id in entry['eliminados']]
+                )
+        if self.on_publish is not None:
+            self.on_publish(snapshot, diff, previous, persist=False)
+        return True
+
+    def changes_since(self, generation):
+        """(entradas del changelog posteriores a generation, ¿el changelog cubre todo el intervalo?)"""
+        entries = [entry for entry in self.changelog if entry['generacion'] > generation]
+        current = self._snapshot.generation if self._snapshot is not None else 0
+        oldest = self.changelog[0]['generacion'] if self.changelog else None
+        complete = generation >= current or (oldest is not None and oldest <= generation + 1)
+        return entries, complete
+
+    def install(self, snapshot):
+        """Usar un snapshot cargado de disco mientras no haya uno más reciente"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = snapshot
+                return True
+        return False
+
+    def current(self):
+        """Snapshot actual o None, sin refrescar nunca"""
+        if self.shared is not None and not self.shared.leading:
+            self.sync()
+        return self._snapshot
+
+    def get(self):
+        """Devolver el snapshot actual; solo hace scraping si todavía no existe ninguno"""
+        snapshot = self.current()
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+            if snapshot is None:
+                raise RuntimeError("No hay datos de partidos disponibles")
+        return snapshot
+
+    def artifact(self, name, build, group=None, limit=None):
+        """(snapshot, Artifact) con build(snapshot) -> bytes calculado una sola vez por snapshot
+
+        Sin group es una respuesta canónica (/api/matches, /calendar.ics) que se conserva siempre.
+        Con group va a una LRU de ese grupo con como mucho limit entradas, para que las consultas
+        arbitrarias no desplacen a las canónicas ni hagan crecer la caché sin límite.
+        """
+        snapshot = self.get()
+        if group is None:
+            artifact = snapshot.artifacts.get(name)
+            cache_result('artifact', artifact is not None)
+            if artifact is None:
+                with self._render_lock:
+                    artifact = snapshot.artifacts.get(name)
+                    if artifact is None:
+                        artifact = snapshot.artifacts[name] = self._build_artifact(snapshot, build)
+            return snapshot, artifact
+
+        with self._render_lock:
+            cache = snapshot.variants.get(group)
+            if cache is None:
+                cache = snapshot.variants[group] = OrderedDict()
+            artifact = cache.get(name)
+            cache_result('artifact', artifact is not None)
+            if artifact is not None:
+                cache.move_to_end(name)
+            else:
+                artifact = cache[name] = self._build_artifact(snapshot, build)
+                while len(cache) > limit:
+                    cache.popitem(last=False)
+        return snapshot, artifact
+
+    @staticmethod
+    def _build_artifact(snapshot, build):
+        with stage('serialize'):
+            body = build(snapshot)
+        return Artifact(body)
+
+    def calendar(self, tz=None):
+        """(snapshot, Artifact) con el calendario iCalendar renderizado (en la zona tz si se indica)"""
+        if tz is None:
+            return self.artifact('ics', lambda snapshot: self.ics_renderer.render(snapshot.matches, snapshot.refreshed_at))
+        return self.artifact(
+            f"ics@{tz}", lambda snapshot: self._tz_renderer(tz).render(snapshot.matches, snapshot.refreshed_at),
+            group='ics@tz', limit=settings.MAX_CACHED_TIMEZONES
+        )
+
+    def _tz_renderer(self, tz):
+        """IcsRenderer de una zona (LRU de MAX_CACHED_TIMEZONES; se llama con _render_lock tomado)"""
+        renderer = self._tz_renderers.get(tz)
+        if renderer is None:
+            renderer = self._tz_renderers[tz] = IcsRenderer(tz, self.calendar_name)
+            while len(self._tz_renderers) > settings.MAX_CACHED_TIMEZONES:
+                self._tz_renderers.popitem(last=False)
+        else:
+            self._tz_renderers.move_to_end(tz)
+        return renderer
+
+    def start(self, scheduler=None, job_id='refresh-matches'):
+        """Arrancar el refresco en segundo plano (en un scheduler propio o compartido)"""
+        if self._scheduler is not None:
+            return
+
+        owns_scheduler = scheduler is None
+        if owns_scheduler:
+            from apscheduler.schedulers.background import BackgroundScheduler
+            scheduler = BackgroundScheduler(daemon=True, timezone=self.timezone)
+            scheduler.start()
+
+        self._scheduler = scheduler
+        self._job_id = job_id
+        self._schedule(datetime.now(self.timezone))
+        logging.info(f"⏱️ Refresco adaptativo programado ({job_id})")
+
+    def _schedule(self, run_date):
+        """Programar la próxima ejecución como un trabajo de fecha única"""
+        self.next_refresh_at = run_date
+        self._scheduler.add_job(
+            self._scheduled_refresh,
+            'date',
+            run_date=run_date,
+            id=self._job_id,
+            replace_existing=True,
+            misfire_grace_time=None,
+            coalesce=True
+        )
+
+    def _scheduled_refresh(self):
+        """Refrescar y calcular la siguiente ejecución a partir del calendario del snapshot"""
+        delay = settings.REFRESH_RETRY_SECONDS
+        try:
+            self.refresh()
+            snapshot = self._snapshot
+            if snapshot is not None:
+                delay = next_refresh_delay(snapshot.matches, datetime.now(self.timezone), self.interval_minutes)
+                if snapshot.stale:
+                    delay = min(delay, settings.REFRESH_RETRY_SECONDS)
+        finally:
+            if self._scheduler is not None:
+                run_date = datetime.now(self.timezone) + timedelta(seconds=delay)
+                self._schedule(run_date)
+                logging.info(f"⏱️ Próximo refresco ({self._job_id}) en {delay}s")
+
+    def shutdown(self):
+        """Detener el refresco programado"""
+        if self._scheduler is not None:
+            if self._scheduler.get_job(self._job_id):
+                self._scheduler.remove_job(self._job_id)
+            self._scheduler = None
+
+
+class SnapshotRegistry:
+    """Un SnapshotStore por (equipo, temporada), publicados en un FixtureStore común
+
+    Los snapshots mapeados de un worker seguidor no se vuelcan en el FixtureStore ni en la
+    clasificación al adoptarlos: /api/match lee el partido del índice del fichero compartido, la
+    clasificación llega ya serializada por el líder y el resto se indexa solo si se pide.
+    """
+
+    def __init__(self, fetcher, fixture_store, teams=None, timezone=settings.TIMEZONE, archive=None, live_feed=None,
+                 shared=None, standings=None, seasons=None):
+        self.fetcher = fetcher
+        self.fixture_store = fixture_store
+        self.archive = archive
+        self.live_feed = live_feed
+        self.shared = shared
+        self.standings = standings
+        self.teams = teams if teams is not None else settings.TEAMS
+        # Solo se crean stores (scraping, tarea programada, filas en SQLite) de temporadas permitidas
+        self.seasons = [str(season) for season in (seasons if seasons is not None else settings.SEASONS)]
+        self.timezone = timezone
+        self._stores = {}
+        self._unindexed = {}  # (equipo, temporada) -> MappedSnapshot aún no volcado en el FixtureStore
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._scheduler = None
+
+    def store(self, team, season):
+        """SnapshotStore de (equipo, temporada); KeyError si el equipo no está configurado y
+        ValueError si la temporada no está entre las permitidas"""
+        if team not in self.teams:
+            raise KeyError(team)
+        if str(season) not in self.seasons:
+            raise ValueError(f"Temporada no disponible: {season}")
+
+        key = (team, str(season))
+        store = self._stores.get(key)
+        if store is None:
+            with self._lock:
+                store = self._stores.get(key)
+                if store is None:
+                    store = SnapshotStore(
+                        lambda: self.fetcher(*key),
+                        timezone=self.timezone,
+                        on_publish=lambda *args, **kwargs: self._publish(key, *args, **kwargs),
+                        shared=self.shared.for_key(*key) if self.shared is not None else None,
+                        share_extras=(lambda: self._shared_extras(key)) if self.standings is not None else None,
+                        calendar_name=self.teams[team].get('name', team)
+                    )
+                    self._stores[key] = store
+                    if self._scheduler is not None:
+                        store.start(self._scheduler, job_id=f"refresh-{key[0]}-{key[1]}")
+        return store
+
+    def _shared_extras(self, key):
+        """Clasificación completa que el líder comparte junto al snapshot"""
+        return {'standings': self.standings.artifact(*key)[1]}
+
+    def _publish(self, key, snapshot, diff=None, previous=None, persist=True):
+        """Volcar el snapshot nuevo en el FixtureStore, en disco, en el feed en vivo y en la clasificación"""
+        team, season = key
+        if persist and self.archive is not None:
+            with stage('persist'):
+                self.archive.save(team, season, snapshot)
+
+        if self.live_feed is not None:
+            self.live_feed.publish(team, season, snapshot, diff, previous)
+
+        with self._index_lock:
+            if snapshot.mapped:
+                # Seguidor: no se decodifica nada hasta que una petición lo necesite
+                self._unindexed[key] = snapshot
+                return
+            self._unindexed.pop(key, None)
+            self._index(key, snapshot, diff)
+
+    def _index(self, key, snapshot, diff=None):
+        """Aplicar el snapshot a la clasificación y al FixtureStore (con _index_lock tomado)"""
+        team, season = key
+        if self.standings is not None:
+            self.standings.apply(team, season, snapshot, diff)
+        self.fixture_store.apply(team, season, snapshot, diff)
+
+    def ensure_indexed(self, team=None):
+        """Volcar en el FixtureStore los snapshots mapeados pendientes (de un equipo o de todos)"""
+        if not self._unindexed:
+            return
+        with self._index_lock:
+            for key in [key for key in self._unindexed if team is None or key[0] == team]:
+                self._index(key, self._unindexed.pop(key))
+
+    def find(self, match_id, team=None, season=None):
+        """Partido por id: en los snapshots mapeados sin indexar se decodifica solo ese partido"""
+        for (owner_team, owner_season), snapshot in list(self._unindexed.items()):
+            if (team is None or owner_team == team) and (season is None or owner_season == season):
+                match = snapshot.find(match_id)
+                if match is not None:
+                    return match
+        return self.fixture_store.find(match_id, team=team, season=season)
+
+    def standings_artifact(self, team, season, competition=None):
+        """(momento del último cambio, Artifact) de la clasificación: la del líder si este worker es
+        seguidor, la calculada aquí en otro caso"""
+        snapshot = self._unindexed.get((team, season))
+        shared = snapshot.artifacts.get('standings') if snapshot is not None else None
+        if shared is not None:
+            return self.standings.from_shared(team, season, shared, competition)
+        return self.standings.artifact(team, season, competition)
+
+    def warm_load(self):
+        """Cargar los snapshots guardados en disco para servir sin esperar al primer scraping"""
+        if self.archive is None:
+            return 0
+
+        loaded = 0
+        for team, season, refreshed_at, generation, matches in self.archive.load_all():
+            if team not in self.teams or season not in self.seasons:
+                continue
+            store = self.store(team, season)
+            if store.shared is not None and (store.sync() or not store.shared.try_lead()):
+                # Modo compartido: se mapea la versión publicada y solo el líder decodifica la de disco
+                continue
+            # La generación guardada se conserva: versiones y ETags no vuelven a empezar al reiniciar
+            snapshot = Snapshot(restore_matches(matches), refreshed_at, generation=generation)
+            if store.install(snapshot):
+                self._publish((team, season), snapshot, persist=False)
+                store.share()
+                loaded += 1
+
+        logging.info(f"💾 {loaded} snapshots cargados desde disco")
+        return loaded
+
+    def start(self, seasons=None):
+        """Programar el refresco de todos los equipos configurados en las temporadas indicadas"""
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        self._scheduler = BackgroundScheduler(daemon=True, timezone=pytz.timezone(self.timezone))
+        self._scheduler.start()
+        for team in self.teams:
+            for season in seasons or settings.SEASONS:
+                self.store(team, season).start(self._scheduler, job_id=f"refresh-{team}-{season}")
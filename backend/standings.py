@@ -0,0 +1,283 @@
+# archivo: standings.py - Clasificación por competición actualizada partido a partido
+#
+# Cada resultado final suma (o resta, si se corrige o desaparece) sus puntos y goles a la fila de
+# cada equipo y al cara a cara de la pareja: O(1) por partido, sin recorrer la temporada. El orden
+# con desempates se calcula al leer y se reutiliza hasta que cambia algún resultado.
+#
+# Las fuentes solo traen los partidos del equipo configurado: la tabla resume sus resultados frente
+# a cada rival (cada rival aparece solo con los partidos que jugó contra él), no la clasificación
+# oficial de la liga. La respuesta lo indica en metadata.alcance.
+
+import itertools
+import threading
+
+import serialization
+from match_index import slugify
+from snapshot import Artifact
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+
+# Partidos entre dos equipos necesarios para que cuente el cara a cara (ida y vuelta)
+H2H_MATCHES = 2
+
+# Qué partidos resume la tabla (solo los del equipo consultado)
+SCOPE = 'partidos_del_equipo'
+SCOPE_NOTE = 'Calculada solo con los partidos del equipo contra cada rival; no es la clasificación oficial'
+
+
+def final_score(match):
+    """(goles local, goles visitante) de un partido finalizado; None si aún no tiene resultado"""
+    if str(match.get('status', '')).upper() != 'FINISHED':
+        return None
+    home_score, away_score = match.get('home_score'), match.get('away_score')
+    if home_score is None or away_score is None:
+        return None
+    return int(home_score), int(away_score)
+
+
+def _selected(name, slug):
+    """¿Entra la competición name en el filtro slug ('' = todas)?"""
+    return not slug or slugify(name) == slug
+
+
+def _serialize(metadata, standings):
+    return serialization.dumps({'metadata': metadata, 'clasificaciones': standings})
+
+
+class TeamRecord:
+    """Fila de la clasificación (también se usa para el cara a cara de una pareja)"""
+
+    __slots__ = ('team', 'played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points')
+
+    def __init__(self, team):
+        self.team = team
+        self.played = self.won = self.drawn = self.lost = 0
+        self.goals_for = self.goals_against = self.points = 0
+
+    @property
+    def goal_difference(self):
+        return self.goals_for - self.goals_against
+
+    def add(self, scored, conceded, sign=1):
+        """Sumar (sign=1) o descontar (sign=-1) un resultado"""
+        self.played += sign
+        self.goals_for += sign * scored
+        self.goals_against += sign * conceded
+        if scored > conceded:
+            self.won += sign
+            self.points += sign * POINTS_WIN
+        elif scored == conceded:
+            self.drawn += sign
+            self.points += sign * POINTS_DRAW
+        else:
+            self.lost += sign
+
+    def to_dict(self, position):
+        return {
+            'posicion': position,
+            'equipo': self.team,
+            'jugados': self.played,
+            'ganados': self.won,
+            'empatados': self.drawn,
+            'perdidos': self.lost,
+            'goles_favor': self.goals_for,
+            'goles_contra': self.goals_against,
+            'diferencia_goles': self.goal_difference,
+            'puntos': self.points
+        }
+
+
+class StandingsTable:
+    """Clasificación de una competición con el cara a cara de cada pareja de equipos"""
+
+    def __init__(self, competition):
+        self.competition = competition
+        self._rows = {}     # equipo -> TeamRecord
+        self._h2h = {}      # (equipo, equipo) ordenados -> {equipo: TeamRecord}
+        self._ranking = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add_result(self, home, away, home_goals, away_goals, sign=1):
+        """Sumar o descontar un partido en las filas de ambos equipos y en su cara a cara"""
+        pair_key = (home, away) if home <= away else (away, home)
+        pair = self._h2h.get(pair_key)
+        if pair is None:
+            pair = self._h2h[pair_key] = {home: TeamRecord(home), away: TeamRecord(away)}
+
+        for team, scored, conceded in ((home, home_goals, away_goals), (away, away_goals, home_goals)):
+            row = self._rows.get(team)
+            if row is None:
+                row = self._rows[team] = TeamRecord(team)
+            row.add(scored, conceded, sign)
+            pair[team].add(scored, conceded, sign)
+            if not row.played:
+                del self._rows[team]
+
+        if not pair[home].played:
+            del self._h2h[pair_key]
+        self._ranking = None
+
+    def ranking(self):
+        """Filas ordenadas: puntos y, entre empatados, los criterios de _tie_key"""
+        if self._ranking is None:
+            rows = sorted(self._rows.values(), key=lambda row: -row.points)
+            ranking = []
+            for _, group in itertools.groupby(rows, key=lambda row: row.points):
+                group = list(group)
+                ranking.extend(sorted(group, key=self._tie_key(group)) if len(group) > 1 else group)
+            self._ranking = ranking
+        return self._ranking
+
+    def _tie_key(self, group):
+        """Empate a puntos: cara a cara entre los empatados (puntos y diferencia de goles) si ya se
+        jugaron todos sus partidos; después diferencia de goles general, goles a favor y nombre"""
+        mini = {row.team: [0, 0] for row in group}
+        for a, b in itertools.combinations(mini, 2):
+            pair = self._h2h.get((a, b) if a <= b else (b, a))
+            if pair is None or pair[a].played < H2H_MATCHES:
+                mini = None
+                break
+            for team in (a, b):
+                mini[team][0] += pair[team].points
+                mini[team][1] += pair[team].goal_difference
+
+        def key(row):
+            h2h_points, h2h_difference = mini[row.team] if mini is not None else (0, 0)
+            return (-h2h_points, -h2h_difference, -row.goal_difference, -row.goals_for, row.team)
+        return key
+
+    def to_list(self):
+        return [row.to_dict(position) for position, row in enumerate(self.ranking(), start=1)]
+
+
+class StandingsEngine:
+    """Clasificaciones por (equipo, temporada, competición) alimentadas por los snapshots publicados"""
+
+    def __init__(self):
+        self._tables = {}    # (equipo, temporada) -> {competición: StandingsTable}
+        self._results = {}   # (equipo, temporada) -> {id: (competición, local, visitante, goles, goles)}
+        # (equipo, temporada) -> (generación, refreshed_at) del snapshot en que cambió algún resultado:
+        # iguales en todos los workers que comparten snapshot, así que también lo son los ETags
+        self._versions = {}
+        self._bodies = {}    # (equipo, temporada, competición) -> (versión, Artifact)
+        self._lock = threading.Lock()
+
+    def apply(self, team, season, snapshot, diff=None):
+        """Incorporar los resultados añadidos, corregidos o eliminados; True si cambió la clasificación"""
+        key = (team, season)
+        with self._lock:
+            if diff is None or key not in self._results:
+                changed = self._replace(key, snapshot.matches)
+            else:
+                changed = False
+                for match_id in diff.removed:
+                    changed |= self._set_result(key, match_id, None)
+                for match_id in itertools.chain(diff.added, diff.changed):
+                    changed |= self._set_result(key, match_id, snapshot.by_id.get(match_id))
+
+            if changed or key not in self._versions:
+                self._versions[key] = (snapshot.generation, snapshot.refreshed_at)
+        return changed
+
+    @staticmethod
+    def _result_of(match):
+        score = final_score(match) if match is not None else None
+        if score is None:
+            return None
+        return (match.get('competition') or '', match.get('home_team'), match.get('away_team')) + score
+
+    def _set_result(self, key, match_id, match):
+        """Sustituir el resultado de un partido (None = sin resultado); True si cambió"""
+        results = self._results[key]
+        old = results.get(match_id)
+        new = self._result_of(match)
+        if old == new:
+            return False
+
+        tables = self._tables[key]
+        if old is not None:
+            competition, *result = old
+            tables[competition].add_result(*result, sign=-1)
+            if not tables[competition]:
+                del tables[competition]
+            del results[match_id]
+        if new is not None:
+            competition, *result = new
+            table = tables.get(competition)
+            if table is None:
+                table = tables[competition] = StandingsTable(competition)
+            table.add_result(*result)
+            results[match_id] = new
+        return True
+
+    def _replace(self, key, matches):
+        """Reconstruir desde cero (primer snapshot o sin diff); True si los resultados difieren"""
+        results = {}
+        for match in matches:
+            result = self._result_of(match)
+            if result is not None:
+                results[str(match['id'])] = result
+        if results == self._results.get(key):
+            return False
+
+        tables = {}
+        for competition, *result in results.values():
+            table = tables.get(competition)
+            if table is None:
+                table = tables[competition] = StandingsTable(competition)
+            table.add_result(*result)
+        self._tables[key] = tables
+        self._results[key] = results
+        return True
+
+    def artifact(self, team, season, competition=None):
+        """(momento del último cambio o None, Artifact JSON) de las clasificaciones; se serializa de
+        nuevo solo cuando cambia algún resultado. competition filtra por nombre o slug"""
+        key = (team, season)
+        slug = slugify(competition) if competition else ''
+        with self._lock:
+            version, updated_at = self._versions.get(key, (0, None))
+            cached = self._bodies.get(key + (slug,))
+            if cached is not None and cached[0] == version:
+                return updated_at, cached[1]
+
+            tables = self._tables.get(key, {})
+            standings = {name: table.to_list() for name, table in sorted(tables.items()) if _selected(name, slug)}
+            metadata = {
+                'equipo': team,
+                'temporada': season,
+                'alcance': SCOPE,
+                'nota': SCOPE_NOTE,
+                'ultima_actualizacion': updated_at.isoformat() if updated_at is not None else None,
+                'version': version,
+                'puntos': {'victoria': POINTS_WIN, 'empate': POINTS_DRAW},
+                'desempates': ['cara_a_cara', 'diferencia_goles', 'goles_favor']
+            }
+            artifact = Artifact(_serialize(metadata, standings), last_modified=updated_at)
+            # Una competición inexistente no ocupa caché
+            if standings or not slug:
+                self._bodies[key + (slug,)] = (version, artifact)
+        return updated_at, artifact
+
+    def from_shared(self, team, season, shared, competition=None):
+        """Como artifact(), a partir de la clasificación completa que publicó el worker líder: el
+        filtro por competición produce los mismos bytes (y ETag) que en el líder"""
+        if not competition:
+            return shared.last_modified, shared
+        key = (team, season, slugify(competition))
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached is not None and cached[0] == shared.etag:
+                return shared.last_modified, cached[1]
+
+            data = serialization.loads(shared.body)
+            standings = {
+                name: rows for name, rows in data['clasificaciones'].items() if _selected(name, key[2])
+            }
+            artifact = Artifact(_serialize(data['metadata'], standings), last_modified=shared.last_modified)
+            if standings:
+                self._bodies[key] = (shared.etag, artifact)
+        return shared.last_modified, artifact
@@ -0,0 +1,11 @@
+"""Configuración común de los tests del backend"""
+
+import os
+import sys
+
+# Sin scheduler, disco ni lock files: cada test monta lo que necesita
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('PERSIST_SNAPSHOTS', 'false')
+os.environ.setdefault('SINGLEFLIGHT_LOCK_FILES', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,16 @@
+"""Los parámetros numéricos inválidos devuelven un 400 con un mensaje para el cliente"""
+
+import pytest
+
+from app import app
+
+
+@pytest.mark.parametrize('url, headers, message', [
+    ('/api/changes?since=ayer', {}, 'since debe ser un número entero'),
+    ('/api/live', {'Last-Event-ID': 'x'}, 'Last-Event-ID debe ser un número entero'),
+    ('/api/matches?limit=diez', {}, 'limit debe ser un número entero'),
+])
+def test_invalid_integer_is_a_400(url, headers, message):
+    response = app.test_client().get(url, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': message}
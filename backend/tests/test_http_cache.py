@@ -0,0 +1,40 @@
+"""HttpCache: validadores del GET condicional y resultado parseado reutilizable ante un 304"""
+
+import pytest
+
+from http_cache import HttpCache
+
+URL = 'https://www.transfermarkt.es/real-madrid-castilla/spielplan/verein/6767'
+
+
+class Response:
+    def __init__(self, content, headers):
+        self.content = content
+        self.headers = headers
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path))
+
+
+def test_validators_come_from_the_last_200(cache):
+    assert cache.validators(URL) == {}
+    cache.store(URL, Response(b'<html>v1</html>', {'ETag': '"v1"', 'Last-Modified': 'Sun, 14 Sep 2025 10:00:00 GMT'}))
+
+    assert cache.validators(URL) == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Sun, 14 Sep 2025 10:00:00 GMT'}
+    assert cache.load_body(URL) == b'<html>v1</html>'
+    assert cache.validators(URL + '/otra') == {}
+
+
+def test_parsed_result_is_tied_to_body_and_parser_version(cache):
+    cache.store(URL, Response(b'v1', {'ETag': '"v1"'}))
+    cache.store_parsed(URL, 4, {'matches': [], 'opponents': ['CD Lugo']})
+
+    assert cache.load_parsed(URL, 4) == {'matches': [], 'opponents': ['CD Lugo']}
+    # Otro parser no reutiliza el resultado
+    assert cache.load_parsed(URL, 3) is None
+    # Un cuerpo nuevo (200) invalida el resultado del anterior
+    cache.store(URL, Response(b'v2', {'ETag': '"v2"'}))
+    assert cache.load_parsed(URL, 4) is None
+    assert cache.validators(URL) == {'If-None-Match': '"v2"'}
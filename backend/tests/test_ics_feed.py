@@ -0,0 +1,56 @@
+"""El calendario solo depende de los datos del snapshot"""
+
+from datetime import datetime
+
+import pytz
+
+from ics_feed import IcsRenderer
+from snapshot import Snapshot, diff_matches
+
+RAW = [
+    {'id': 'm1', 'date': '2025-09-07', 'time': '10:00', 'madrid_time': '18:00', 'home_team': 'Real Madrid Castilla',
+     'away_team': 'CD Lugo', 'competition': 'Primera Federación', 'venue': 'Di Stéfano', 'status': 'finished',
+     'result': '2-0', 'home_score': 2, 'away_score': 0},
+    {'id': 'm2', 'date': '2025-09-14', 'time': '11:00', 'madrid_time': '19:00', 'home_team': 'CD Numancia',
+     'away_team': 'Real Madrid Castilla', 'competition': 'Primera Federación', 'venue': '', 'status': 'scheduled'}
+]
+
+
+def make_snapshot():
+    refreshed_at = pytz.timezone('America/Guatemala').localize(datetime(2025, 9, 8, 12, 0))
+    return Snapshot(diff_matches({}, RAW)[0], refreshed_at)
+
+
+def test_same_snapshot_same_bytes_across_renderers():
+    snapshot = make_snapshot()
+    first = IcsRenderer().render(snapshot.matches, snapshot.refreshed_at)
+    # Otro worker (renderer nuevo) y otro render con caché de eventos caliente
+    assert IcsRenderer().render(snapshot.matches, snapshot.refreshed_at) == first
+    renderer = IcsRenderer()
+    renderer.render(snapshot.matches, snapshot.refreshed_at)
+    assert renderer.render(snapshot.matches, snapshot.refreshed_at) == first
+    assert b'DTSTAMP:20250908T180000Z' in first
+
+
+def test_timezone_renderer_is_deterministic():
+    snapshot = make_snapshot()
+    body = IcsRenderer('Europe/London').render(snapshot.matches, snapshot.refreshed_at)
+    assert body == IcsRenderer('Europe/London').render(snapshot.matches, snapshot.refreshed_at)
+    assert b'X-WR-TIMEZONE:Europe/London' in body
+    assert b'Hora local: 17:00' in body
+
+
+def test_unparseable_kickoff_is_all_day_or_skipped():
+    raw = [dict(RAW[1], id='sin-hora', time='Por confirmar'), dict(RAW[1], id='sin-fecha', date='', time='')]
+    snapshot = Snapshot(diff_matches({}, raw)[0], make_snapshot().refreshed_at)
+    body = IcsRenderer().render(snapshot.matches, snapshot.refreshed_at)
+    assert b'DTSTART;VALUE=DATE:20250914' in body
+    assert b'DTEND;VALUE=DATE:20250915' in body
+    assert b'UID:sin-hora@' in body and b'UID:sin-fecha@' not in body
+
+
+def test_calendar_name_comes_from_the_team():
+    snapshot = make_snapshot()
+    body = IcsRenderer(name='Real Madrid Juvenil A').render(snapshot.matches, snapshot.refreshed_at)
+    assert b'X-WR-CALNAME:Real Madrid Juvenil A' in body
+    assert b'X-WR-CALNAME:Real Madrid Castilla' in IcsRenderer().render(snapshot.matches, snapshot.refreshed_at)
@@ -0,0 +1,97 @@
+"""LiveFeed: buffer circular de deltas, reanudación con Last-Event-ID y despertar de suscriptores"""
+
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+from live_feed import LiveFeed
+from snapshot import Snapshot, diff_matches
+
+
+def live(match_id, home_score):
+    return {'id': match_id, 'date': '2025-09-14', 'time': '12:00', 'home_team': 'Real Madrid Castilla',
+            'away_team': 'Rival', 'competition': 'Primera Federación', 'status': 'LIVE',
+            'home_score': home_score, 'away_score': 0, 'result': f"{home_score}-0"}
+
+
+def refresh(previous, raw):
+    """(snapshot, diff) de un refresco con los partidos raw"""
+    matches, diff = diff_matches(previous.by_id if previous is not None else {}, raw)
+    return Snapshot(matches, datetime.now(pytz.utc)), diff
+
+
+def publish_goals(feed, goals, team='castilla'):
+    """Un refresco por gol del partido m1; devuelve el último snapshot"""
+    snapshot, _ = refresh(None, [live('m1', 0)])
+    for home_score in range(1, goals + 1):
+        previous = snapshot
+        snapshot, diff = refresh(previous, [live('m1', home_score)])
+        feed.publish(team, '2025', snapshot, diff, previous)
+    return snapshot
+
+
+def events(stream, count):
+    """Los count primeros mensajes SSE que no son keep-alive"""
+    received = []
+    for message in stream:
+        if not message.startswith(':'):
+            received.append(message)
+        if len(received) == count:
+            return received
+
+
+def test_reconnect_resumes_from_the_buffer():
+    feed = LiveFeed(size=3, heartbeat_seconds=0.05)
+    snapshot = publish_goals(feed, 2)
+
+    messages = events(feed.subscribe('castilla', '2025', snapshot, last_event_id=1), 2)
+    assert messages[0].startswith('retry:')
+    assert messages[1].startswith('id: 2\nevent: delta\n') and '"home_score":2' in messages[1]
+
+
+def test_reconnect_outside_the_buffer_gets_a_snapshot():
+    feed = LiveFeed(size=3, heartbeat_seconds=0.05)
+    snapshot = publish_goals(feed, 5)
+
+    # Solo quedan los eventos 3-5: desde el 1 se perdió el 2, así que se envía el estado completo
+    assert [event[0] for event in feed._events] == [3, 4, 5]
+    messages = events(feed.subscribe('castilla', '2025', snapshot, last_event_id=1), 2)
+    assert messages[1].startswith('id: 5\nevent: snapshot\n') and '"home_score":5' in messages[1]
+
+
+def test_publish_wakes_waiting_subscribers():
+    feed = LiveFeed(heartbeat_seconds=30)
+    snapshot = publish_goals(feed, 1)
+    streams = [feed.subscribe('castilla', '2025', snapshot) for _ in range(3)]
+    for stream in streams:
+        events(stream, 2)  # retry y snapshot inicial
+
+    received = []
+    waiting = [threading.Thread(target=lambda s=s: received.append(events(s, 1)[0])) for s in streams]
+    for thread in waiting:
+        thread.start()
+    time.sleep(0.1)
+    assert not received and feed.subscribers == 3
+
+    previous = snapshot
+    snapshot, diff = refresh(previous, [live('m1', 2)])
+    started = time.monotonic()
+    feed.publish('castilla', '2025', snapshot, diff, previous)
+    for thread in waiting:
+        thread.join(timeout=2)
+
+    # Sin esperar al heartbeat de 30 s
+    assert time.monotonic() - started < 2
+    assert len(received) == 3 and all(m.startswith('id: 2\nevent: delta\n') for m in received)
+
+
+def test_other_teams_are_not_delivered():
+    feed = LiveFeed(heartbeat_seconds=0.05)
+    snapshot = publish_goals(feed, 1)
+    stream = feed.subscribe('castilla', '2025', snapshot)
+    events(stream, 2)
+
+    publish_goals(feed, 1, team='juvenil')
+    assert next(stream) == ': ping\n\n'
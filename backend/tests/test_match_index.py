@@ -0,0 +1,73 @@
+"""Consultas de /api/matches sobre Snapshot.index: filtros, proyección y paginación por cursor"""
+
+from datetime import datetime
+
+import pytest
+import pytz
+
+from match_index import decode_cursor, encode_cursor, project
+from snapshot import Snapshot, diff_matches
+
+
+def match(match_id, day, competition='Primera Federación', status='scheduled', hour='12:00'):
+    return {'id': match_id, 'date': day, 'time': hour, 'home_team': 'Real Madrid Castilla', 'away_team': 'Rival',
+            'competition': competition, 'status': status}
+
+
+RAW = [
+    match('m4', '2025-09-21'),
+    match('m1', '2025-08-31', status='finished'),
+    match('m3', '2025-09-14', competition='Copa Federación'),
+    match('m2', '2025-09-07', status='finished'),
+    match('m5', '2025-09-14', hour='10:00'),
+]
+
+
+@pytest.fixture
+def index():
+    snapshot = Snapshot(diff_matches({}, RAW)[0], pytz.utc.localize(datetime(2025, 9, 1)))
+    return snapshot.index
+
+
+def ids(matches):
+    return [m.id for m in matches]
+
+
+def test_filters_combine_and_keep_date_order(index):
+    assert ids(index.query()[0]) == ['m1', 'm2', 'm5', 'm3', 'm4']
+    assert ids(index.query(competition='primera federacion')[0]) == ['m1', 'm2', 'm5', 'm4']
+    assert ids(index.query(status='FINISHED')[0]) == ['m1', 'm2']
+    assert ids(index.query(date_from='2025-09-07', date_to='2025-09-14')[0]) == ['m2', 'm5', 'm3']
+    assert ids(index.query(competition='Primera Federación', status='scheduled', date_from='2025-09-10')[0]) == [
+        'm5', 'm4'
+    ]
+    assert index.query(competition='Liga de Campeones') == ([], None)
+
+
+def test_cursor_pagination_walks_every_match_once(index):
+    pages = []
+    after = None
+    while True:
+        matches, next_key = index.query(limit=2, after=after)
+        pages.append(ids(matches))
+        if next_key is None:
+            break
+        # El cursor viaja opaco al cliente y vuelve en la siguiente petición
+        after = decode_cursor(encode_cursor(next_key))
+    assert pages == [['m1', 'm2'], ['m5', 'm3'], ['m4']]
+
+    filtered, next_key = index.query(status='scheduled', limit=2)
+    assert ids(filtered) == ['m5', 'm3']
+    assert ids(index.query(status='scheduled', limit=2, after=next_key)[0]) == ['m4']
+
+
+def test_invalid_input_is_a_value_error(index):
+    with pytest.raises(ValueError):
+        index.query(date_from='14/09/2025')
+    with pytest.raises(ValueError):
+        decode_cursor('no-es-un-cursor')
+
+
+def test_projection_always_keeps_the_id(index):
+    matches, _ = index.query(limit=1)
+    assert project(matches, ['date']) == [{'id': 'm1', 'date': '2025-08-31'}]
@@ -0,0 +1,57 @@
+"""Un reinicio con los mismos datos de origen no cambia el snapshot"""
+
+import serialization
+from fixture_store import FixtureStore
+from persistence import SnapshotArchive
+from snapshot import SnapshotRegistry
+
+RAW_MATCHES = [
+    # api-football / fotmob / sofascore traen el saque inicial
+    {'id': 'apifootball-1', 'date': '2025-09-14', 'time': '04:00', 'madrid_time': '12:00',
+     'home_team': 'Real Madrid Castilla', 'away_team': 'Rival A', 'competition': 'Primera Federación',
+     'venue': 'Alfredo Di Stéfano', 'status': 'SCHEDULED', 'source': 'api-football', 'kickoff': 1757844000},
+    # Transfermarkt omite campos
+    {'id': 'tm-2', 'date': '2025-09-21', 'time': '04:00', 'home_team': 'Rival B',
+     'away_team': 'Real Madrid Castilla', 'competition': 'Primera Federación', 'status': 'SCHEDULED'},
+]
+
+
+def build_body(snapshot):
+    return serialization.dumps({
+        'generacion': snapshot.generation,
+        'ultima_actualizacion': snapshot.refreshed_at.isoformat(),
+        'partidos': [match.to_dict() for match in snapshot.matches]
+    })
+
+
+def make_registry(path, published):
+    registry = SnapshotRegistry(
+        lambda team, season: [dict(match) for match in RAW_MATCHES], FixtureStore(),
+        teams={'castilla': {}}, seasons=['2025'], archive=SnapshotArchive(path)
+    )
+    publish = registry._publish
+    registry._publish = lambda key, snapshot, diff=None, *args, **kwargs: (
+        published.append(diff), publish(key, snapshot, diff, *args, **kwargs)
+    )
+    return registry
+
+
+def test_restart_with_same_data_is_unchanged(tmp_path):
+    path = str(tmp_path / 'snapshots.db')
+    first = make_registry(path, [])
+    store = first.store('castilla', '2025')
+    assert store.refresh()
+    before, artifact = store.artifact('matches', build_body)
+
+    published = []
+    second = make_registry(path, published)
+    assert second.warm_load() == 1
+    store = second.store('castilla', '2025')
+    assert store.refresh()
+
+    after, restarted = store.artifact('matches', build_body)
+    assert published == [None]  # solo la carga en caliente: el refresco no encuentra cambios
+    assert after is store.get()
+    assert (after.generation, after.refreshed_at) == (before.generation, before.refreshed_at)
+    assert restarted.etag == artifact.etag
+    assert after.find('apifootball-1').kickoff == 1757844000
@@ -0,0 +1,41 @@
+"""Cadencia adaptativa: next_refresh_delay según el partido más cercano"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import settings
+from refresh_policy import next_refresh_delay
+
+TZ = pytz.timezone(settings.TIMEZONE)
+NOW = TZ.localize(datetime(2025, 9, 14, 10, 0))
+INTERVAL = settings.REFRESH_INTERVAL_MINUTES * 60
+
+
+def match(kickoff, status='scheduled'):
+    return {'id': 'm', 'date': kickoff.strftime('%Y-%m-%d'), 'time': kickoff.strftime('%H:%M'), 'status': status}
+
+
+@pytest.mark.parametrize('matches, expected', [
+    # En juego (por estado o por estar dentro de la ventana de un partido ya empezado)
+    ([match(NOW + timedelta(days=3), status='LIVE')], settings.REFRESH_LIVE_SECONDS),
+    ([match(NOW - timedelta(minutes=30))], settings.REFRESH_LIVE_SECONDS),
+    # Saque inicial en menos de una hora: cada pocos minutos, sin bajar de la cadencia en vivo
+    ([match(NOW + timedelta(minutes=30))], settings.REFRESH_KICKOFF_SECONDS),
+    ([match(NOW + timedelta(minutes=2))], 120),
+    # En menos de un día: el intervalo configurado, o despertar una hora antes del saque
+    ([match(NOW + timedelta(hours=5))], INTERVAL),
+    ([match(NOW + timedelta(minutes=70))], 600),
+    # Lejos o sin partidos pendientes: el máximo
+    ([match(NOW + timedelta(days=3))], settings.REFRESH_IDLE_SECONDS),
+    ([match(NOW - timedelta(days=1), status='finished')], settings.REFRESH_IDLE_SECONDS),
+    ([], settings.REFRESH_IDLE_SECONDS),
+])
+def test_next_refresh_delay(matches, expected):
+    assert next_refresh_delay(matches, NOW) == expected
+
+
+def test_nearest_kickoff_wins():
+    matches = [match(NOW + timedelta(days=3)), match(NOW + timedelta(minutes=30)), match(NOW + timedelta(hours=5))]
+    assert next_refresh_delay(matches, NOW) == settings.REFRESH_KICKOFF_SECONDS
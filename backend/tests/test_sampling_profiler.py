@@ -0,0 +1,66 @@
+"""El profiler muestrea desde un hilo nativo las pilas de los demás hilos"""
+
+import sys
+import threading
+import time
+
+from sampling_profiler import SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_busy_thread():
+    profiler = SamplingProfiler(interval_ms=2)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    profiler.start()
+    try:
+        time.sleep(0.3)
+    finally:
+        profiler.stop()
+        stop.set()
+        worker.join()
+
+    assert profiler.samples > 0
+    assert 'busy_loop (test_sampling_profiler.py)' in profiler.collapsed()
+    assert '_run (sampling_profiler.py)' not in profiler.collapsed()
+
+
+def sampler_threads():
+    return sum(
+        1 for frame in sys._current_frames().values()
+        if frame.f_code.co_name == '_run' and frame.f_code.co_filename.endswith('sampling_profiler.py')
+    )
+
+
+def test_restart_keeps_a_single_sampler():
+    time.sleep(0.1)  # los hilos de profilers ya parados terminan en su siguiente intervalo
+    before = sampler_threads()
+    profiler = SamplingProfiler(interval_ms=50)
+    profiler.start()
+    profiler.stop()
+    profiler.start()
+    time.sleep(0.2)
+    try:
+        assert sampler_threads() - before == 1
+    finally:
+        profiler.stop()
+
+
+def test_distinct_stacks_are_capped():
+    profiler = SamplingProfiler(interval_ms=1, max_stacks=1)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    profiler.start()
+    try:
+        time.sleep(0.2)
+    finally:
+        profiler.stop()
+        stop.set()
+        worker.join()
+    assert len(profiler.stacks) <= 2
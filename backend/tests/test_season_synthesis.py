@@ -0,0 +1,26 @@
+"""La temporada sintética depende solo de la semilla y del generador de sorteos"""
+
+from datetime import date
+
+import pytest
+
+from season_synthesis import SeasonSynthesizer, numpy
+
+
+def synthesize(vectorized):
+    synthesizer = SeasonSynthesizer(teams=4, seed='castilla|2025', today=date(2025, 10, 1), vectorized=vectorized)
+    return synthesizer.backend, [(m['id'], m['home_score'], m['time']) for m in synthesizer]
+
+
+def test_same_seed_same_season_with_random():
+    backend, matches = synthesize(False)
+    assert backend == 'random'
+    assert synthesize(False) == (backend, matches)
+    assert len(matches) == 12
+
+
+@pytest.mark.skipif(numpy is None, reason="numpy no instalado")
+def test_same_seed_same_season_with_numpy():
+    backend, matches = synthesize(True)
+    assert backend == 'numpy'
+    assert synthesize(True) == (backend, matches)
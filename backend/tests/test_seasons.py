@@ -0,0 +1,23 @@
+"""Solo se sirven las temporadas configuradas"""
+
+import pytest
+
+from fixture_store import FixtureStore
+from snapshot import SnapshotRegistry
+
+
+def test_registry_rejects_unknown_seasons():
+    registry = SnapshotRegistry(lambda team, season: [], FixtureStore(), teams={'castilla': {}}, seasons=['2025'])
+    assert registry.store('castilla', '2025') is registry.store('castilla', 2025)
+    with pytest.raises(ValueError):
+        registry.store('castilla', '1999')
+    with pytest.raises(KeyError):
+        registry.store('otro', '2025')
+    assert list(registry._stores) == [('castilla', '2025')]
+
+
+def test_fixture_store_keeps_every_loaded_season():
+    store = FixtureStore()
+    for season in ('2023', '2025', '2024'):
+        store.replace('castilla', season, [])
+    assert store.seasons('castilla') == ['2023', '2024', '2025']
@@ -0,0 +1,80 @@
+"""Un worker seguidor adopta la versión del líder sin reconstruir los partidos"""
+
+import pytest
+
+import serialization
+from fixture_store import FixtureStore
+from shared_snapshot import SharedSnapshots
+from snapshot import SnapshotRegistry
+from standings import StandingsEngine
+
+fcntl = pytest.importorskip('fcntl')
+
+
+def result(match_id, away, home_score, away_score, competition='Primera Federación'):
+    return {'id': match_id, 'date': '2025-09-14', 'time': '12:00', 'home_team': 'Real Madrid Castilla',
+            'away_team': away, 'competition': competition, 'status': 'FINISHED',
+            'home_score': home_score, 'away_score': away_score}
+
+
+def build_matches(snapshot):
+    return serialization.dumps({'partidos_completos': [match.to_dict() for match in snapshot.matches]})
+
+
+def follower_fetcher(team, season):
+    raise AssertionError("un seguidor no debe hacer scraping")
+
+
+def make_registry(tmp_path, fetcher):
+    return SnapshotRegistry(
+        fetcher, FixtureStore(), teams={'castilla': {}}, seasons=['2025'],
+        shared=SharedSnapshots(str(tmp_path), build_matches), standings=StandingsEngine()
+    )
+
+
+@pytest.fixture
+def workers(tmp_path):
+    matches = [result('1', 'Rival A', 2, 0), result('2', 'Rival B', 1, 1), result('3', 'Rival C', 0, 1, 'Copa')]
+    leader = make_registry(tmp_path, lambda team, season: matches)
+    assert leader.store('castilla', '2025').refresh()
+    follower = make_registry(tmp_path, follower_fetcher)
+    return leader, follower
+
+
+def test_follower_does_not_decode_on_sync(workers):
+    _, follower = workers
+    snapshot = follower.store('castilla', '2025').get()
+    assert snapshot.mapped
+    assert snapshot._matches is None
+    assert follower.fixture_store.find('2') is None
+
+    match = follower.find('2')
+    assert (match.away_team, match.home_score, match.away_score) == ('Rival B', 1, 1)
+    assert follower.find('99') is None
+    assert snapshot._matches is None
+
+
+def test_follower_serves_leader_standings(workers):
+    leader, follower = workers
+    follower.store('castilla', '2025').get()
+    for competition in (None, 'primera-federacion', 'copa', 'inexistente'):
+        expected = leader.standings_artifact('castilla', '2025', competition)
+        served = follower.standings_artifact('castilla', '2025', competition)
+        assert served[1].etag == expected[1].etag
+        assert served[0] == expected[0]
+    assert not follower.standings._tables
+
+
+def test_follower_indexes_on_demand(workers):
+    _, follower = workers
+    follower.store('castilla', '2025').get()
+    follower.ensure_indexed('castilla')
+    assert follower.fixture_store.competitions('castilla', '2025')
+    assert follower.find('1') is follower.fixture_store.find('1')
+
+
+def test_follower_keeps_source_digests(workers):
+    leader, follower = workers
+    led = leader.store('castilla', '2025').get()
+    mapped = follower.store('castilla', '2025').get()
+    assert [(m.id, m.digest, m.kickoff) for m in mapped.matches] == [(m.id, m.digest, m.kickoff) for m in led.matches]
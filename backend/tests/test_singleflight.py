@@ -0,0 +1,103 @@
+"""SingleFlight: coalescencia en el proceso, ventana compartida entre workers y lock file sin bloquear"""
+
+import fcntl
+import os
+import threading
+import time
+
+import settings
+from singleflight import SingleFlight
+
+
+def test_share_window_is_shorter_than_the_live_cadence():
+    assert settings.SINGLEFLIGHT_SHARE_SECONDS <= settings.REFRESH_LIVE_SECONDS // 2
+
+
+def test_waits_for_another_worker_without_blocking(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path), share_seconds=0)
+    flight.do(('castilla', '2025'), lambda: ['previo'])
+
+    # Otro "worker" (otro descriptor) tiene el lock: la llamada espera reintentando con LOCK_NB
+    with open(tmp_path / 'singleflight-castilla-2025.lock', 'a') as other:
+        fcntl.flock(other, fcntl.LOCK_EX)
+        results = []
+        caller = threading.Thread(target=lambda: results.append(flight.do(('castilla', '2025'), lambda: ['nuevo'])))
+        caller.start()
+        time.sleep(0.2)
+        assert caller.is_alive() and not results
+        fcntl.flock(other, fcntl.LOCK_UN)
+
+    caller.join(timeout=2)
+    assert results == [['nuevo']]
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def scrape():
+        calls.append(1)
+        release.wait(2)
+        return ['partido']
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do(('castilla', '2025'), scrape)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert calls == [1]
+    assert results == [['partido']] * 5
+    # Terminada la llamada, la siguiente vuelve a ejecutar
+    assert flight.do(('castilla', '2025'), lambda: ['otro']) == ['otro']
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(2)
+        raise RuntimeError('fuente caída')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do(('castilla', '2025'), fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert errors == ['fuente caída'] * 3
+
+
+def test_result_is_shared_between_workers_within_the_window(tmp_path):
+    # Dos instancias con el mismo directorio hacen de dos workers
+    first = SingleFlight(lock_dir=str(tmp_path), share_seconds=5)
+    second = SingleFlight(lock_dir=str(tmp_path), share_seconds=5)
+    assert first.do(('castilla', '2025'), lambda: ['del primero']) == ['del primero']
+    assert second.do(('castilla', '2025'), lambda: ['del segundo']) == ['del primero']
+    # Otra clave no comparte resultado
+    assert second.do(('castilla', '2024'), lambda: ['2024']) == ['2024']
+
+
+def test_result_older_than_the_window_is_not_reused(tmp_path):
+    first = SingleFlight(lock_dir=str(tmp_path), share_seconds=1)
+    first.do(('castilla', '2025'), lambda: ['viejo'])
+    shared = tmp_path / 'singleflight-castilla-2025.json'
+    old = time.time() - 2
+    os.utime(shared, (old, old))
+
+    assert SingleFlight(lock_dir=str(tmp_path), share_seconds=1).do(('castilla', '2025'), lambda: ['nuevo']) == ['nuevo']
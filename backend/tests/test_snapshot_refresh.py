@@ -0,0 +1,37 @@
+"""Un refresco que termina después de otro publica el diff contra el snapshot vigente"""
+
+from snapshot import SnapshotStore
+
+
+def match(match_id, status='SCHEDULED'):
+    return {'id': match_id, 'date': '2025-09-14', 'time': '12:00', 'home_team': 'Real Madrid Castilla',
+            'away_team': 'Rival', 'competition': 'Primera Federación', 'status': status}
+
+
+class SlowDiff(list):
+    """Partidos cuyo primer recorrido (el cálculo del diff) deja publicar antes a otro refresco"""
+
+    def __init__(self, matches, interleave):
+        super().__init__(matches)
+        self.interleave = interleave
+
+    def __iter__(self):
+        interleave, self.interleave = self.interleave, None
+        if interleave is not None:
+            interleave()
+        return super().__iter__()
+
+
+def test_overlapping_refresh_does_not_add_twice():
+    published = []
+    responses = [
+        SlowDiff([match('1'), match('2'), match('3')], lambda: store.refresh()),
+        [match('1'), match('2')]
+    ]
+    store = SnapshotStore(lambda: responses.pop(0),
+                          on_publish=lambda snapshot, diff, previous: published.append(diff))
+    store.refresh()
+
+    assert [diff.added for diff in published] == [['1', '2'], ['3']]
+    assert [m.id for m in store.get().matches] == ['1', '2', '3']
+    assert store.get().generation == 2
@@ -0,0 +1,166 @@
+"""Consulta paralela de fuentes contra servidores locales simulados"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fotmob_scraper import HybridCastillaScraper
+from http_client import HttpClient
+from metrics import SOURCE_REQUESTS
+
+KICKOFF = '2025-09-07T16:00:00+00:00'
+KICKOFF_TS = 1757260800
+
+
+def api_football_body(home_score):
+    return {'response': [{
+        'fixture': {'id': 1, 'date': KICKOFF, 'status': {'short': 'FT'}, 'venue': {'name': 'Di Stéfano'},
+                    'referee': 'Árbitro'},
+        'teams': {'home': {'name': 'Real Madrid Castilla'}, 'away': {'name': 'CD Lugo'}},
+        'league': {'name': 'Primera Federación'},
+        'goals': {'home': home_score, 'away': 0}
+    }]}
+
+
+def fotmob_body():
+    fixtures = [
+        # Mismo partido que API-Football (pierde en la fusión) y otro solo en FotMob
+        {'id': 10, 'status': {'utcTime': KICKOFF.replace('+00:00', 'Z'), 'finished': True, 'scoreStr': '9 - 9'},
+         'home': {'name': 'Real Madrid Castilla'}, 'away': {'name': 'CD Lugo'}, 'tournament': {'name': 'PF'}},
+        {'id': 11, 'status': {'utcTime': '2025-09-14T16:00:00Z'},
+         'home': {'name': 'CD Numancia'}, 'away': {'name': 'Real Madrid Castilla'}, 'tournament': {'name': 'PF'}}
+    ]
+    return {'fixtures': {'allFixtures': {'fixtures': fixtures}}}
+
+
+def sofascore_body():
+    return {'events': [{
+        'id': 20, 'startTimestamp': KICKOFF_TS + 7 * 86400, 'status': {'type': 'notstarted'},
+        'homeTeam': {'name': 'CD Numancia'}, 'awayTeam': {'name': 'Real Madrid Castilla'},
+        'tournament': {'name': 'Primera Federación'}
+    }]}
+
+
+class StubServer:
+    """Servidor HTTP local; routes: prefijo de ruta -> (estado, cuerpo JSON, segundos de espera)"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                for prefix, (status, body, delay) in stub.routes.items():
+                    if self.path.startswith(prefix):
+                        break
+                else:
+                    status, body, delay = 404, {}, 0
+                time.sleep(delay)
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass  # el cliente ya cerró por timeout
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def make_scraper():
+    servers = []
+
+    def make(api_football=(200, api_football_body(2), 0), fotmob=(200, fotmob_body(), 0),
+             sofascore=(200, sofascore_body(), 0), deadline=2.0):
+        server = StubServer({'/api-football': api_football, '/fotmob': fotmob, '/sofascore': sofascore})
+        servers.append(server)
+
+        scraper = HybridCastillaScraper(season='2025', team='castilla')
+        scraper.sources = ['api_football', 'fotmob', 'sofascore']
+        scraper.team_ids = {'api_football': 1, 'fotmob': 2, 'sofascore': 3}
+        scraper.api_football_key = 'test'
+        scraper.api_football_base = f"{server.url}/api-football"
+        scraper.fotmob_base = f"{server.url}/fotmob"
+        scraper.sofascore_base = f"{server.url}/sofascore"
+        scraper.source_deadline = deadline
+        scraper.http = HttpClient(retries=1, backoff=0.05, read_timeout=5)
+        return scraper
+
+    yield make
+    for server in servers:
+        server.close()
+
+
+def outcome_delta(source, outcome):
+    before = SOURCE_REQUESTS.value(source=source, outcome=outcome)
+    return lambda: SOURCE_REQUESTS.value(source=source, outcome=outcome) - before
+
+
+def test_merge_priority(make_scraper):
+    matches = make_scraper().fetch_all_sources()
+
+    by_opponent = {(m['date'], m['home_team'], m['away_team']): m for m in matches}
+    assert len(matches) == 2
+    lugo = by_opponent[('2025-09-07', 'Real Madrid Castilla', 'CD Lugo')]
+    # API-Football tiene prioridad sobre FotMob para el mismo partido
+    assert lugo['source'] == 'api-football'
+    assert lugo['result'] == '2-0'
+    # FotMob gana a SofaScore en el partido que tienen ambas
+    numancia = by_opponent[('2025-09-14', 'CD Numancia', 'Real Madrid Castilla')]
+    assert numancia['source'] == 'fotmob'
+
+
+def test_error_source_does_not_block_others(make_scraper):
+    errors = outcome_delta('api_football', 'error')
+    matches = make_scraper(api_football=(500, {}, 0)).fetch_all_sources()
+
+    assert errors() == 1
+    assert {m['source'] for m in matches} == {'fotmob'}
+    lugo = next(m for m in matches if m['away_team'] == 'CD Lugo')
+    assert lugo['result'] == '9-9'
+
+
+def test_slow_source_is_cut_at_deadline(make_scraper):
+    timeouts = outcome_delta('sofascore', 'timeout')
+    scraper = make_scraper(sofascore=(200, sofascore_body(), 10), deadline=1.0)
+
+    finished = threading.Event()
+    fetch_sofascore = scraper.fetch_sofascore
+
+    def tracked():
+        try:
+            return fetch_sofascore()
+        finally:
+            finished.set()
+    scraper.fetch_sofascore = tracked
+
+    start = time.monotonic()
+    matches = scraper.fetch_all_sources()
+    assert time.monotonic() - start < 1.5
+    assert timeouts() == 1
+    assert {m['source'] for m in matches} == {'api-football', 'fotmob'}
+
+    # El hilo del pool queda libre en cuanto vence el plazo, no cuando el servidor responde
+    assert finished.wait(1.0)
+    assert time.monotonic() - start < 2.0
+
+
+def test_all_sources_failing_returns_empty(make_scraper):
+    scraper = make_scraper(api_football=(500, {}, 0), fotmob=(503, {}, 0), sofascore=(404, {}, 0))
+    assert scraper.fetch_all_sources() == []
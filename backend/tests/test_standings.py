@@ -0,0 +1,43 @@
+"""La clasificación (y su ETag) depende solo del snapshot, no del worker ni del momento"""
+
+from datetime import datetime
+
+import pytz
+
+import serialization
+from snapshot import Snapshot, diff_matches
+from standings import SCOPE, StandingsEngine
+
+
+def result(match_id, home, away, home_score, away_score):
+    return {'id': match_id, 'date': '2025-09-14', 'time': '12:00', 'home_team': home, 'away_team': away,
+            'competition': 'Primera Federación', 'status': 'FINISHED',
+            'home_score': home_score, 'away_score': away_score}
+
+
+def snapshot(generation, *matches):
+    refreshed_at = pytz.timezone('America/Guatemala').localize(datetime(2025, 9, 14, 12, generation))
+    return Snapshot(diff_matches({}, list(matches))[0], refreshed_at, generation=generation)
+
+
+def test_same_snapshot_same_etag_in_every_engine():
+    first = snapshot(3, result('1', 'Real Madrid Castilla', 'Rival A', 2, 0))
+    engines = [StandingsEngine(), StandingsEngine()]
+    for engine in engines:
+        engine.apply('castilla', '2025', first)
+    artifacts = [engine.artifact('castilla', '2025')[1] for engine in engines]
+    assert artifacts[0].etag == artifacts[1].etag
+
+    updated_at, artifact = engines[0].artifact('castilla', '2025')
+    metadata = serialization.loads(artifact.body)['metadata']
+    assert updated_at == first.refreshed_at
+    assert metadata['version'] == 3
+    assert metadata['alcance'] == SCOPE
+
+
+def test_version_only_moves_when_a_result_changes():
+    engine = StandingsEngine()
+    engine.apply('castilla', '2025', snapshot(1, result('1', 'Real Madrid Castilla', 'Rival A', 2, 0)))
+    unchanged = snapshot(2, result('1', 'Real Madrid Castilla', 'Rival A', 2, 0))
+    assert not engine.apply('castilla', '2025', unchanged)
+    assert engine.artifact('castilla', '2025')[0].minute == 1
@@ -0,0 +1,44 @@
+"""Horas locales por tramos de desfase: iguales a las de zoneinfo, también en los cambios de hora"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from timezones import OFFSET_BUCKET, LocalClock, get_zone, kickoff_epoch
+
+# Cambios de hora de 2025: Madrid (30 mar y 26 oct), Nueva York (9 mar) y Lord Howe (media hora, 6 abr)
+TRANSITIONS = [
+    ('Europe/Madrid', datetime(2025, 3, 30, 1, 0, tzinfo=timezone.utc)),
+    ('Europe/Madrid', datetime(2025, 10, 26, 1, 0, tzinfo=timezone.utc)),
+    ('America/New_York', datetime(2025, 3, 9, 7, 0, tzinfo=timezone.utc)),
+    ('Australia/Lord_Howe', datetime(2025, 4, 5, 15, 0, tzinfo=timezone.utc)),
+]
+
+
+@pytest.mark.parametrize('name, transition', TRANSITIONS)
+def test_local_matches_zoneinfo_around_dst(name, transition):
+    zone = get_zone(name)
+    local_clock = LocalClock(zone)
+    start = int(transition.timestamp())
+    for epoch in range(start - 3 * 3600, start + 3 * 3600, 60):
+        expected = datetime.fromtimestamp(epoch, zone)
+        assert local_clock.local(epoch) == (expected.strftime('%Y-%m-%d'), expected.strftime('%H:%M'))
+
+
+def test_offsets_are_cached_per_bucket():
+    local_clock = LocalClock(get_zone('Europe/Madrid'))
+    start = int(datetime(2025, 3, 30, tzinfo=timezone.utc).timestamp())
+    for epoch in range(start, start + 86400, 60):
+        local_clock.local(epoch)
+    assert len(local_clock._offsets) == 86400 // OFFSET_BUCKET
+    assert local_clock.local(start) == ('2025-03-30', '01:00')
+    assert local_clock.local(start + 3 * 3600) == ('2025-03-30', '05:00')
+
+
+def test_kickoff_epoch_and_zone_errors():
+    madrid = get_zone('Europe/Madrid')
+    assert kickoff_epoch('2025-10-26', '18:00', madrid) == int(datetime(2025, 10, 26, 17, tzinfo=timezone.utc).timestamp())
+    assert kickoff_epoch('2025-10-26', 'Por confirmar', madrid) is None
+    assert kickoff_epoch(None, None, madrid) is None
+    with pytest.raises(ValueError):
+        get_zone('Marte/Olympus')
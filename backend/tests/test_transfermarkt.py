@@ -0,0 +1,99 @@
+"""Transfermarkt contra un servidor local: solo partidos reales de la página y GET condicional"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_cache
+import settings
+from fotmob_scraper import HybridCastillaScraper
+
+PAGE = '''<html><body>
+<p>Próximos rivales: Racing de Ferrol, SD Ponferradina</p>
+<table>
+  <tr><td>07/09/2025</td><td><a href="/real-madrid-castilla/startseite/verein/6767">Real Madrid Castilla</a></td>
+      <td><a href="/cd-lugo/startseite/verein/1">CD Lugo</a></td><td>2:0</td></tr>
+</table>
+<div class="box">Sábado 27/09/2025 <a href="/zamora-cf/startseite/verein/2">Zamora CF</a></div>
+</body></html>'''.encode('utf-8')
+
+ETAG = '"pagina-v1"'
+
+
+class PageServer:
+    """Sirve PAGE con ETag y responde 304 si el cliente envía el mismo validador"""
+
+    def __init__(self):
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.headers.get('If-None-Match'))
+                if self.headers.get('If-None-Match') == ETAG:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(PAGE)))
+                self.send_header('ETag', ETAG)
+                self.end_headers()
+                self.wfile.write(PAGE)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def page_server(monkeypatch, tmp_path):
+    server = PageServer()
+    monkeypatch.setattr(settings, 'TRANSFERMARKT_BASE_URL', server.url)
+    monkeypatch.setattr(settings, 'PARSER_ENGINE', 'lxml')
+    monkeypatch.setattr(http_cache, '_cache', http_cache.HttpCache(str(tmp_path)))
+    yield server
+    server.close()
+
+
+def transfermarkt_scraper():
+    scraper = HybridCastillaScraper(season='2025', team='castilla')
+    scraper.team_ids = {'transfermarkt': '6767'}
+    return scraper
+
+
+def test_synthetic_matches_are_not_merged(page_server):
+    matches = transfermarkt_scraper().fetch_transfermarkt()
+
+    # Solo la fila de la tabla: ni los partidos fijos por palabras clave ni el rival del box con fecha inventada
+    assert [(m['date'], m['home_team'], m['away_team'], m['result']) for m in matches] == [
+        ('2025-09-07', 'Real Madrid Castilla', 'CD Lugo', '2-0')
+    ]
+
+
+def test_not_modified_reuses_parse_but_recomputes_inferred_dates(page_server, monkeypatch):
+    from fotmob_scraper_backup import FotMobScraper
+
+    url = f"{page_server.url}/calendario"
+    first = FotMobScraper().fetch_page_matches(url)
+    read = [m for m in first if m['source'] != 'transfermarkt-inferred']
+    inferred = [m for m in first if m['source'] == 'transfermarkt-inferred']
+    assert [{m['home_team'], m['away_team']} for m in inferred] == [{'Zamora CF', 'Real Madrid Castilla'}]
+
+    # Ante el 304 no se vuelve a parsear, pero la fecha del rival suelto se calcula de nuevo
+    scraper = FotMobScraper()
+    monkeypatch.setattr(scraper, 'parse_page_content', lambda content: pytest.fail('no debe parsear'))
+    monkeypatch.setattr(scraper, 'create_match_from_opponent', lambda opponent: {'id': opponent, 'date': 'hoy'})
+    second = scraper.fetch_page_matches(url)
+
+    assert page_server.requests == [None, ETAG]
+    assert second == read + [{'id': 'Zamora CF', 'date': 'hoy'}]
@@ -0,0 +1,82 @@
+# archivo: timezones.py - Horas de partido en cualquier zona horaria (?tz=) convertidas por lotes
+#
+# Cada partido guarda su saque inicial una sola vez como segundos epoch UTC (Match.kickoff). La
+# fecha y la hora locales se derivan sumando el desfase de la zona, cacheado por tramos de 15
+# minutos (los cambios de horario de tzdata caen en cuartos de hora): convertir un snapshot entero
+# cuesta una consulta a un dict por partido en lugar de un astimezone + strftime.
+
+import threading
+from datetime import date, datetime, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Tramo (segundos) con un desfase constante respecto a UTC
+OFFSET_BUCKET = 900
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=None)
+def _zone(name):
+    return ZoneInfo(name)
+
+
+def get_zone(name):
+    """ZoneInfo de un nombre IANA (p. ej. 'Europe/London'); ValueError si no existe"""
+    try:
+        return _zone(name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        raise ValueError(f"Zona horaria desconocida: {name}") from None
+
+
+def kickoff_epoch(day, hour, zone):
+    """Segundos epoch UTC de una fecha 'YYYY-MM-DD' y hora 'HH:MM' locales (None si no se pueden leer)"""
+    try:
+        local = datetime(int(day[0:4]), int(day[5:7]), int(day[8:10]), int(hour[0:2]), int(hour[3:5]), tzinfo=zone)
+    except (TypeError, ValueError):
+        return None
+    return int(local.timestamp())
+
+
+class LocalClock:
+    """Fecha y hora locales de instantes UTC en una zona, con desfases y fechas cacheados"""
+
+    def __init__(self, zone):
+        self.zone = zone
+        self._offsets = {}  # tramo de OFFSET_BUCKET -> desfase en segundos
+        self._dates = {}    # días desde 1970 -> 'YYYY-MM-DD'
+
+    def offset(self, epoch):
+        bucket = epoch // OFFSET_BUCKET
+        offset = self._offsets.get(bucket)
+        if offset is None:
+            instant = datetime.fromtimestamp(bucket * OFFSET_BUCKET, dt_timezone.utc)
+            offset = self._offsets[bucket] = int(instant.astimezone(self.zone).utcoffset().total_seconds())
+        return offset
+
+    def local(self, epoch):
+        """('YYYY-MM-DD', 'HH:MM') del instante epoch en la zona"""
+        days, seconds = divmod(epoch + self.offset(epoch), 86400)
+        day = self._dates.get(days)
+        if day is None:
+            day = self._dates[days] = date.fromordinal(UNIX_EPOCH_ORDINAL + days).isoformat()
+        return day, f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+    def convert(self, matches):
+        """{id: (fecha, hora)} de los partidos con saque inicial conocido"""
+        local = self.local
+        return {match.id: local(match.kickoff) for match in matches if match.kickoff is not None}
+
+
+_clocks = {}
+_clocks_lock = threading.Lock()
+
+
+def clock(name):
+    """LocalClock compartido de una zona (los desfases se calculan una vez por proceso)"""
+    local_clock = _clocks.get(name)
+    if local_clock is None:
+        zone = get_zone(name)
+        with _clocks_lock:
+            local_clock = _clocks.setdefault(name, LocalClock(zone))
+    return local_clock